@@ -1,64 +1,41 @@
-import sys
-import re
-from datetime import timedelta
+import argparse
 
-def parse_time(time_str):
-    time_str = time_str.replace(',', '.')
-    try:
-        if '.' in time_str:
-            parts = time_str.split('.')
-            h, m, s = parts[0].split(':')
-            ms = parts[1]
-        else:
-            h, m, s = time_str.split(':')
-            ms = '0'
-        return timedelta(hours=int(h), minutes=int(m), seconds=int(s), milliseconds=int(ms))
-    except Exception as e:
-        return None
-
-def format_time(td):
-    if td.total_seconds() < 0:
-        td = timedelta(0)
-    total_seconds = int(td.total_seconds())
-    milliseconds = int(td.microseconds / 1000)
-    h = total_seconds // 3600
-    m = (total_seconds % 3600) // 60
-    s = total_seconds % 60
-    return f"{h:02}:{m:02}:{s:02},{milliseconds:03}"
+from subtitles import CueList, iter_srt, parse_timestamp, save_cues, shift_cues
 
 def adjust_srt_timestamps(input_srt_path, start_offset_str, output_srt_path):
-    start_offset = parse_time(start_offset_str)
-    if start_offset is None:
+    """Shifts every cue back by start_offset, clamping negative times to zero."""
+    try:
+        start_offset = parse_timestamp(start_offset_str)
+    except ValueError:
         return
 
-    with open(input_srt_path, 'r', encoding='utf-8') as infile, \
-         open(output_srt_path, 'w', encoding='utf-8') as outfile:
-        for line in infile:
-            time_match = re.match(r'(\d{2}:\d{2}:\d{2}[,.]\d{3}) --> (\d{2}:\d{2}:\d{2}[,.]\d{3})', line)
-            if time_match:
-                start_time_str, end_time_str = time_match.groups()
-                
-                start_time = parse_time(start_time_str)
-                end_time = parse_time(end_time_str)
-
-                if start_time is None or end_time is None:
-                    outfile.write(line)
-                    continue
+    save_cues(shift_cues(iter_srt(input_srt_path), start_offset), output_srt_path)
 
-                adjusted_start_time = start_time - start_offset
-                adjusted_end_time = end_time - start_offset
+def extract_srt_window(input_srt_path, start_str, end_str, output_srt_path, cue_list=None):
+    """
+    Writes only the cues overlapping [start, end), clipped, retimed and renumbered.
 
-                outfile.write(f"{format_time(adjusted_start_time)} --> {format_time(adjusted_end_time)}\n")
-            else:
-                outfile.write(line)
+    Pass a subtitles.CueList to reuse an already parsed file across many windows.
+    """
+    try:
+        start = parse_timestamp(start_str)
+        end = parse_timestamp(end_str)
+    except ValueError:
+        return
+    if cue_list is None:
+        cue_list = CueList(iter_srt(input_srt_path))
+    save_cues(cue_list.window(start, end), output_srt_path)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python adjust_srt.py <input_srt_path> <start_offset_hh:mm:ss> <output_srt_path>")
-        sys.exit(1)
-
-    input_srt_path = sys.argv[1]
-    start_offset_str = sys.argv[2]
-    output_srt_path = sys.argv[3]
-
-    adjust_srt_timestamps(input_srt_path, start_offset_str, output_srt_path)
+    parser = argparse.ArgumentParser(description="Shift SRT timestamps to a new start, optionally keeping only the cues of a window.")
+    parser.add_argument("input_srt_path", help="Path to the input SRT file.")
+    parser.add_argument("start_offset", help="Start offset (HH:MM:SS).")
+    parser.add_argument("output_srt_path", help="Path to the output SRT file.")
+    parser.add_argument("--end", help="End of the window (HH:MM:SS). Only overlapping cues are written, clipped and renumbered.")
+
+    args = parser.parse_args()
+
+    if args.end:
+        extract_srt_window(args.input_srt_path, args.start_offset, args.end, args.output_srt_path)
+    else:
+        adjust_srt_timestamps(args.input_srt_path, args.start_offset, args.output_srt_path)
@@ -0,0 +1,120 @@
+import os
+import re
+import time
+import argparse
+import tempfile
+from datetime import timedelta
+
+import subtitles
+
+# The pre-subtitles implementations of adjust_srt.py and srt_to_text.py,
+# kept here verbatim (minus I/O error handling) as the baseline.
+
+def legacy_parse_time(time_str):
+    time_str = time_str.replace(',', '.')
+    try:
+        if '.' in time_str:
+            parts = time_str.split('.')
+            h, m, s = parts[0].split(':')
+            ms = parts[1]
+        else:
+            h, m, s = time_str.split(':')
+            ms = '0'
+        return timedelta(hours=int(h), minutes=int(m), seconds=int(s), milliseconds=int(ms))
+    except Exception:
+        return None
+
+def legacy_format_time(td):
+    if td.total_seconds() < 0:
+        td = timedelta(0)
+    total_seconds = int(td.total_seconds())
+    milliseconds = int(td.microseconds / 1000)
+    h = total_seconds // 3600
+    m = (total_seconds % 3600) // 60
+    s = total_seconds % 60
+    return f"{h:02}:{m:02}:{s:02},{milliseconds:03}"
+
+def legacy_adjust(input_srt_path, start_offset_str, output_srt_path):
+    start_offset = legacy_parse_time(start_offset_str)
+    with open(input_srt_path, 'r', encoding='utf-8') as infile, \
+         open(output_srt_path, 'w', encoding='utf-8') as outfile:
+        for line in infile:
+            time_match = re.match(r'(\d{2}:\d{2}:\d{2}[,.]\d{3}) --> (\d{2}:\d{2}:\d{2}[,.]\d{3})', line)
+            if time_match:
+                start_time = legacy_parse_time(time_match.group(1))
+                end_time = legacy_parse_time(time_match.group(2))
+                outfile.write(f"{legacy_format_time(start_time - start_offset)} --> {legacy_format_time(end_time - start_offset)}\n")
+            else:
+                outfile.write(line)
+
+def legacy_text_lines(srt_path):
+    with open(srt_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    output = []
+    for line in lines:
+        line = line.strip()
+        if re.match(r'^\d+$', line):
+            continue
+        if re.match(r'^\d{2}:\d{2}:\d{2}', line):
+            continue
+        if not line:
+            continue
+        if not output or line != output[-1]:
+            output.append(line)
+    return output
+
+def generate_caption_file(path, hours, cue_ms=2000):
+    """Writes a synthetic livestream-style SRT with overlapping rolling cues."""
+    words = "so what we are doing here is streaming live and talking about code".split()
+    with open(path, 'w', encoding='utf-8') as f:
+        count = hours * 3600 * 1000 // cue_ms
+        for i in range(count):
+            start = i * cue_ms
+            text = ' '.join(words[(i + j) % len(words)] for j in range(8))
+            f.write(f"{i + 1}\n{subtitles.format_timestamp(start)} --> {subtitles.format_timestamp(start + cue_ms + 500)}\n{text}\n\n")
+    return count
+
+def timed(label, func, size_bytes, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    mb_per_s = size_bytes / (1024 * 1024) / best if best else float('inf')
+    print(f"  {label:<36}{best * 1000:>10.1f} ms{mb_per_s:>10.1f} MB/s")
+    return best
+
+def run_benchmark(srt_path, repeat=3):
+    size = os.path.getsize(srt_path)
+    print(f"Benchmarking {srt_path} ({size / (1024 * 1024):.1f} MB), best of {repeat}:")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'out.srt')
+
+        print("Parse:")
+        old_parse = timed("legacy srt_to_text (regex)", lambda: legacy_text_lines(srt_path), size, repeat)
+        new_parse = timed("subtitles.read_cues", lambda: subtitles.read_cues(srt_path), size, repeat)
+
+        print("Parse + retime + write:")
+        old_write = timed("legacy adjust_srt (regex+timedelta)", lambda: legacy_adjust(srt_path, '00:10:00', out), size, repeat)
+        new_write = timed("subtitles shift_cues + save_cues",
+                          lambda: subtitles.save_cues(subtitles.shift_cues(subtitles.iter_srt(srt_path), 600000), out),
+                          size, repeat)
+
+    print(f"Speed-up: parse {old_parse / new_parse:.2f}x, retime+write {old_write / new_write:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare subtitle parse/write throughput against the legacy scripts.")
+    parser.add_argument("srt_path", nargs='?', help="Caption file to benchmark (default: a generated livestream file).")
+    parser.add_argument("--hours", type=int, default=4, help="Length of the generated caption file (default: 4).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3).")
+
+    args = parser.parse_args()
+
+    if args.srt_path:
+        run_benchmark(args.srt_path, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'livestream.srt')
+            cues = generate_caption_file(path, args.hours)
+            print(f"Generated {cues} cues ({args.hours}h).")
+            run_benchmark(path, args.repeat)
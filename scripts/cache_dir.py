@@ -0,0 +1,10 @@
+import os
+
+# Local caches shared by the scripts live in {repo}/.cache unless CACHE_DIR is set.
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+def cache_path(*parts):
+    """Returns a path inside the cache directory, creating its parent directories."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer
+
+from youtube_stub_server import StubChannel, StubHandler
+from youtube_upload import upload_state_path
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def start_stub(drop_ratio):
+    """Starts the YouTube stub on a free port in a background thread, with an empty channel."""
+    StubHandler.channel = StubChannel(0)
+    StubHandler.latency = 0.0
+    StubHandler.drop_ratio = drop_ratio
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def upload_command(video_path, chunk_mb):
+    return [sys.executable, os.path.join(SCRIPTS_DIR, "upload_youtube_video.py"), "--file", video_path,
+            "--title", "Resume check", "--description", "Uploaded by check_upload_resume.py", "--chunk_mb", str(chunk_mb)]
+
+def wait_for_offset(video_path, offset, process, timeout=120):
+    """Waits until the saved upload state confirms at least offset bytes. Returns False if the upload ended first."""
+    path = upload_state_path(video_path)
+    deadline = time.monotonic() + timeout
+    while process.poll() is None and time.monotonic() < deadline:
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    if json.load(f)["offset"] >= offset:
+                        return True
+            except (OSError, ValueError):
+                pass # Replaced between the exists check and the read.
+        time.sleep(0.05)
+    return False
+
+def check_upload_resume(size_mb=8, chunk_mb=1, drop_ratio=0.3):
+    """
+    Uploads a random file with upload_youtube_video.py against the stub, which
+    drops a share of the chunk requests, kills the upload halfway and runs the
+    same command again.
+
+    Returns:
+        True if the second run resumed the saved session and the stub channel
+        ends up with exactly one complete video.
+    """
+    server = start_stub(drop_ratio)
+    channel = StubHandler.channel
+    size = size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ,
+                   YOUTUBE_API_ROOT_URL=f"http://127.0.0.1:{server.server_address[1]}/",
+                   YOUTUBE_CREDENTIALS_FILE=os.path.join(work_dir, "no_credentials.json"),
+                   CACHE_DIR=os.path.join(work_dir, "cache"))
+        video_path = os.path.join(work_dir, "video.mp4")
+        with open(video_path, "wb") as f:
+            f.write(os.urandom(size))
+
+        print(f"Run 1: uploading {size_mb} MB in {chunk_mb} MB chunks, {drop_ratio:.0%} of chunks dropped; killing it halfway.")
+        process = subprocess.Popen(upload_command(video_path, chunk_mb), env=env)
+        interrupted = wait_for_offset(video_path, size // 2, process)
+        process.kill()
+        process.wait()
+        if not interrupted:
+            print("Check failed: the first run ended before it could be interrupted.")
+            server.shutdown()
+            return False
+        with open(upload_state_path(video_path), "r") as f:
+            print(f"Killed with {json.load(f)['offset']} of {size} bytes confirmed; {os.path.basename(upload_state_path(video_path))} kept.")
+
+        print("Run 2: same command.")
+        returncode = subprocess.run(upload_command(video_path, chunk_mb), env=env).returncode
+        state_left = os.path.exists(upload_state_path(video_path))
+    server.shutdown()
+
+    with channel.lock:
+        videos = len(channel.videos)
+        sessions = list(channel.sessions.values())
+    problems = []
+    if returncode != 0:
+        problems.append(f"the second run exited with {returncode}")
+    if len(sessions) != 1:
+        problems.append(f"{len(sessions)} upload sessions were started, expected 1 (the second run did not resume)")
+    if videos != 1:
+        problems.append(f"the channel has {videos} videos, expected 1")
+    if any(session["received"] != size for session in sessions):
+        problems.append(f"the stub received {[session['received'] for session in sessions]} bytes, expected {size}")
+    if state_left:
+        problems.append("the upload state file was not removed")
+    print(f"Stub {channel.summary()}")
+    for problem in problems:
+        print(f"Check failed: {problem}.")
+    if not problems:
+        print("Check passed: the upload survived dropped chunks and a restart, and made exactly one video.")
+    return not problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that an interrupted YouTube upload resumes into a single video, against a local stub that drops chunks.")
+    parser.add_argument("--size_mb", type=int, default=8, help="Size of the random test file in MB (default: 8).")
+    parser.add_argument("--chunk_mb", type=int, default=1, help="Upload chunk size in MB (default: 1).")
+    parser.add_argument("--drop_ratio", type=float, default=0.3, help="Share of chunk requests the stub cuts off (default: 0.3).")
+
+    args = parser.parse_args()
+
+    if not check_upload_resume(args.size_mb, args.chunk_mb, args.drop_ratio):
+        sys.exit(1)
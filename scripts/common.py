@@ -0,0 +1,12 @@
+import hashlib
+
+# Bold font used for burned-in titles and thumbnail text.
+FONT_FILE = "/System/Library/Fonts/Supplemental/Arial Bold.ttf"
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,189 @@
+import os
+import time
+import hashlib
+import argparse
+import threading
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from cache_dir import cache_path
+from common import FONT_FILE, file_hash
+
+BACKGROUNDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workflows", "backgrounds")
+BACKGROUND_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+FONT_CANDIDATES = [
+    FONT_FILE,
+    "/Library/Fonts/Arial Bold.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+]
+# (top, bottom) colours for generated backgrounds when there is no background library.
+GRADIENTS = [
+    ((12, 20, 69), (0, 150, 199)),
+    ((58, 12, 90), (214, 40, 110)),
+    ((10, 60, 40), (40, 180, 120)),
+    ((90, 20, 10), (240, 120, 30)),
+    ((20, 20, 20), (90, 90, 110)),
+]
+TEXT_COLOR = (255, 221, 0)
+MIN_FONT_SIZE = 12
+
+def aspect_size(aspect_ratio, long_side=1280):
+    """(width, height) for an aspect ratio like "16:9" with the given long side."""
+    w, h = (int(x) for x in aspect_ratio.split(":"))
+    if w >= h:
+        return long_side, round(long_side * h / w)
+    return round(long_side * w / h), long_side
+
+def load_font(size):
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+def face_crop(reference_image_path, height, box=None):
+    """
+    The face/shoulders cut-out of the reference photo, scaled to height, as RGBA
+    with a feathered left edge. Cached in .cache/thumbnails/ by file hash.
+
+    Args:
+        box: (left, top, right, bottom) crop in source pixels; defaults to the
+            top 80% of the photo, where a 3x4 portrait has the head and shoulders.
+    """
+    key = hashlib.sha256(f"{file_hash(reference_image_path)}:{height}:{box}".encode("utf-8")).hexdigest()[:24]
+    path = cache_path("thumbnails", f"face_{key}.png")
+    if os.path.exists(path):
+        return Image.open(path).convert("RGBA")
+
+    with Image.open(reference_image_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        box = box or (0, 0, img.width, round(img.height * 0.8))
+        face = img.crop(box)
+        face = face.resize((round(face.width * height / face.height), height), Image.LANCZOS)
+
+    # Fade the left edge into the background.
+    feather = max(1, face.width // 5)
+    mask = Image.new("L", face.size, 255)
+    draw = ImageDraw.Draw(mask)
+    for x in range(feather):
+        draw.line([(x, 0), (x, face.height)], fill=round(255 * x / feather))
+    face.putalpha(mask)
+    # Parallel batch items may crop the same photo, so write under a unique
+    # name and rename (atomic) rather than let readers see a partial PNG.
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    face.save(temp, format="PNG")
+    os.replace(temp, path)
+    return face
+
+def pick_background(size, seed, background=None, backgrounds_dir=BACKGROUNDS_DIR):
+    """
+    A background of the given size: the named file, else one picked from the
+    backgrounds library by seed, else a generated vertical gradient.
+    """
+    if background and not os.path.exists(background):
+        background = os.path.join(backgrounds_dir, background)
+    if not background and os.path.isdir(backgrounds_dir):
+        choices = sorted(f for f in os.listdir(backgrounds_dir) if f.lower().endswith(BACKGROUND_EXTENSIONS))
+        if choices:
+            background = os.path.join(backgrounds_dir, choices[seed % len(choices)])
+    if background:
+        with Image.open(background) as img:
+            return ImageOps.fit(img.convert("RGB"), size, Image.LANCZOS)
+
+    top, bottom = GRADIENTS[seed % len(GRADIENTS)]
+    column = Image.new("RGB", (1, size[1]))
+    for y in range(size[1]):
+        t = y / max(1, size[1] - 1)
+        column.putpixel((0, y), tuple(round(a + (b - a) * t) for a, b in zip(top, bottom)))
+    return column.resize(size)
+
+def wrap_text(text, font, max_width, draw):
+    """Greedy word wrap."""
+    lines = []
+    for word in text.split():
+        candidate = f"{lines[-1]} {word}" if lines else word
+        if lines and draw.textlength(candidate, font=font) <= max_width:
+            lines[-1] = candidate
+        else:
+            lines.append(word)
+    return lines
+
+def draw_text(canvas, text, area):
+    """Draws text as large as fits in area (left, top, right, bottom), in at most 3 lines."""
+    draw = ImageDraw.Draw(canvas)
+    left, top, right, bottom = area
+    width, height = right - left, bottom - top
+    # Shrink until the text fits; a tiny area still gets one pass at the minimum size.
+    size = max(MIN_FONT_SIZE, height // 2)
+    while True:
+        font = load_font(size)
+        lines = wrap_text(text.upper(), font, width, draw)
+        line_height = round(size * 1.1)
+        if len(lines) <= 3 and len(lines) * line_height <= height and all(draw.textlength(l, font=font) <= width for l in lines):
+            break
+        if size == MIN_FONT_SIZE:
+            break
+        size = max(MIN_FONT_SIZE, size - 4)
+    stroke = max(2, size // 12)
+    y = top + (height - len(lines) * line_height) // 2
+    for line in lines:
+        draw.text((left, y), line, font=font, fill=TEXT_COLOR, stroke_width=stroke, stroke_fill=(0, 0, 0))
+        y += line_height
+
+def compose_thumbnail(text, output_path, reference_image_path="workflows/Foto-3x4.jpg", size=(1280, 720), background=None, face_box=None):
+    """
+    Builds a thumbnail locally: background, face cut-out from the reference
+    photo and a bold text overlay.
+
+    Args:
+        text: Overlay text (3-4 words work best).
+        output_path: Where to save the thumbnail.
+        reference_image_path: Photo to take the face from (skipped if missing).
+        size: (width, height) of the thumbnail.
+        background: Background image path or file name in workflows/backgrounds/
+            (default: picked from that folder by the text, or a gradient).
+        face_box: Optional (left, top, right, bottom) face crop in the photo.
+
+    Returns:
+        The output path.
+    """
+    started = time.perf_counter()
+    width, height = size
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16)
+    canvas = pick_background(size, seed, background).convert("RGBA")
+
+    landscape = width >= height
+    if reference_image_path and os.path.exists(reference_image_path):
+        face = face_crop(reference_image_path, height if landscape else height // 2, face_box)
+        if landscape:
+            canvas.alpha_composite(face, (width - face.width, 0))
+            text_right = max(width - face.width + face.width // 5, width // 2)
+        else:
+            canvas.alpha_composite(face, ((width - face.width) // 2, height - face.height))
+            text_right = width
+    else:
+        print(f"Warning: Reference image not found at {reference_image_path}. Composing without a face.")
+        text_right = width
+
+    margin = width // 20
+    text_bottom = height - margin if landscape else height // 2
+    draw_text(canvas, text, (margin, margin, text_right - margin, text_bottom))
+
+    canvas = canvas.convert("RGB")
+    canvas.save(output_path)
+    print(f"Thumbnail composed in {(time.perf_counter() - started) * 1000:.0f} ms: {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compose a thumbnail locally from the reference photo, a background and bold text.")
+    parser.add_argument("text", help="Overlay text (3-4 words).")
+    parser.add_argument("output_path", help="Where to save the thumbnail.")
+    parser.add_argument("--reference_image", default="workflows/Foto-3x4.jpg", help="Photo to take the face from.")
+    parser.add_argument("--background", help="Background image, or a file name in workflows/backgrounds/ (default: picked by the text).")
+    parser.add_argument("--aspect_ratio", default="16:9", help="Aspect ratio; the long side is 1280 (default: 16:9 -> 1280x720).")
+    parser.add_argument("--face_box", help="Face crop in the photo as left,top,right,bottom (default: top 80%%).")
+
+    args = parser.parse_args()
+
+    face_box = tuple(int(v) for v in args.face_box.split(",")) if args.face_box else None
+    compose_thumbnail(args.text, args.output_path, args.reference_image, aspect_size(args.aspect_ratio), args.background, face_box)
@@ -0,0 +1,334 @@
+import os
+import json
+import math
+import argparse
+import subprocess
+
+from generate_short import run_command
+from subtitles import parse_timestamp
+
+# Encoders used to re-encode the head and tail so they can be concatenated
+# with the stream-copied middle without changing codec.
+VIDEO_ENCODERS = {
+    'h264': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18'],
+    'hevc': ['-c:v', 'libx265', '-preset', 'veryfast', '-crf', '20'],
+    'vp9': ['-c:v', 'libvpx-vp9', '-b:v', '0', '-crf', '30', '-row-mt', '1'],
+    'av1': ['-c:v', 'libsvtav1', '-crf', '30'],
+}
+# ffprobe profile names -> encoder -profile:v values, so the re-encoded pieces
+# match the copied middle.
+H264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+    'High 10': 'high10',
+    'High 4:2:2': 'high422',
+    'High 4:4:4 Predictive': 'high444',
+}
+HEVC_PROFILES = {
+    'Main': 'main',
+    'Main 10': 'main10',
+}
+# Codecs whose pieces are joined as Annex B with the parameter sets repeated
+# in-band before every keyframe: the bitstream filter that converts the copied
+# middle, and the MP4 sample entry that allows in-band parameter sets.
+ANNEXB_CODECS = {
+    'h264': ('h264_mp4toannexb', 'avc3'),
+    'hevc': ('hevc_mp4toannexb', 'hev1'),
+}
+# The encoders put the parameter sets of the head and tail only in the
+# container header; this copies them in front of every keyframe.
+IN_BAND_HEADERS_BSF = 'dump_extra=freq=keyframe'
+AUDIO_ENCODERS = {
+    'aac': ['-c:a', 'aac', '-b:a', '192k'],
+    'opus': ['-c:a', 'libopus', '-b:a', '160k'],
+    'mp3': ['-c:a', 'libmp3lame', '-b:a', '192k'],
+}
+
+def to_seconds(time_str):
+    """Converts HH:MM:SS[.mmm] (or plain seconds) to float seconds."""
+    try:
+        return float(time_str)
+    except ValueError:
+        return parse_timestamp(time_str) / 1000
+
+def probe_streams(input_path):
+    """Returns the first video and audio stream descriptions reported by ffprobe."""
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries',
+         'stream=codec_type,codec_name,profile,level,pix_fmt,width,height,r_frame_rate,sample_rate,channels',
+         '-of', 'json', input_path],
+        capture_output=True, text=True, check=True).stdout
+    streams = json.loads(output).get('streams', [])
+    video = next((s for s in streams if s['codec_type'] == 'video'), None)
+    audio = next((s for s in streams if s['codec_type'] == 'audio'), None)
+    return video, audio
+
+def keyframe_times(input_path, start, end):
+    """
+    Returns the sorted timestamps (seconds) of the keyframes between start and
+    end that a stream copy can start or stop at.
+
+    Keyframes that open an open GOP (e.g. HEVC CRA frames) are skipped: frames
+    shown before them follow them in decode order and reference the previous
+    GOP, so a copy cut there would drop or break those frames.
+    """
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0',
+         '-read_intervals', f'{start}%{end}', input_path],
+        capture_output=True, text=True, check=True).stdout
+    packets = []
+    for line in output.splitlines():
+        pts, _, flags = line.strip().partition(',')
+        if pts and pts != 'N/A':
+            packets.append((float(pts), 'K' in flags))
+    times = []
+    later_min = math.inf
+    for pts, key in reversed(packets):
+        if key and pts <= later_min and start <= pts <= end:
+            times.append(pts)
+        later_min = min(later_min, pts)
+    return sorted(times)
+
+def fade_filters(duration, fade, fade_in, fade_out):
+    """Builds the video and audio fade filter chains for a piece of the given duration."""
+    video, audio = [], []
+    if fade_in:
+        video.append(f'fade=t=in:st=0:d={fade}')
+        audio.append(f'afade=t=in:st=0:d={fade}')
+    if fade_out:
+        st = max(0.0, duration - fade)
+        video.append(f'fade=t=out:st={st:.3f}:d={fade}')
+        audio.append(f'afade=t=out:st={st:.3f}:d={fade}')
+    return ','.join(video), ','.join(audio)
+
+def frame_rate(video_stream):
+    """The stream's frame rate as a float (r_frame_rate is a fraction like 30000/1001)."""
+    num, _, den = video_stream['r_frame_rate'].partition('/')
+    return float(num) / float(den or 1)
+
+def source_encoder_params(video_stream):
+    """Encoder options that reproduce the source's profile and level, where the encoder supports them."""
+    codec, profile, level = video_stream['codec_name'], video_stream.get('profile'), video_stream.get('level')
+    params = []
+    if codec == 'h264':
+        if profile in H264_PROFILES:
+            params += ['-profile:v', H264_PROFILES[profile]]
+        if level and level > 0:
+            params += ['-level:v', f'{level / 10:.1f}']
+    elif codec == 'hevc':
+        if profile in HEVC_PROFILES:
+            params += ['-profile:v', HEVC_PROFILES[profile]]
+        if level and level > 0:
+            # ffprobe reports general_level_idc (level * 30).
+            params += ['-x265-params', f'level-idc={level / 30:.1f}']
+    return params
+
+def encode_piece(input_path, output_path, start, duration, fade, fade_in, fade_out, video_codec, audio_codec, video_stream=None, audio_stream=None, output_args=None, frames=None):
+    """
+    Re-encodes [start, start + duration] with fades, matching the source stream
+    parameters. An empty audio_codec writes the video only, and an empty
+    video_codec the audio only. frames caps the number of video frames, for
+    pieces that must stop exactly before a keyframe.
+    """
+    vf, af = fade_filters(duration, fade, fade_in, fade_out)
+    command = ['ffmpeg', '-y', '-ss', f'{start:.6f}', '-i', input_path, '-t', f'{duration:.6f}']
+    if vf and video_codec:
+        command += ['-vf', vf]
+    if af and audio_codec:
+        command += ['-af', af]
+    command += (video_codec or ['-vn']) + (audio_codec or ['-an'])
+    if video_stream and video_codec:
+        command += source_encoder_params(video_stream)
+        command += ['-pix_fmt', video_stream['pix_fmt'], '-r', video_stream['r_frame_rate']]
+    if audio_stream and audio_codec:
+        command += ['-ar', str(audio_stream['sample_rate']), '-ac', str(audio_stream['channels'])]
+    if frames:
+        command += ['-frames:v', str(frames)]
+    command += output_args or []
+    command.append(output_path)
+    run_command(command)
+
+def verify_cut(output_path, duration, video_stream):
+    """
+    Decodes the whole cut with ffprobe. Returns False if the decoder reports
+    errors, the frame count is off by more than 0.1s worth of frames (e.g. a
+    GOP duplicated at a join), a join leaves a gap in the video timestamps
+    (which shifts everything after it against the audio), or the audio and
+    video lengths differ by more than 0.1s.
+    """
+    process = subprocess.run(
+        ['ffprobe', '-v', 'error', '-count_frames',
+         '-show_entries', 'stream=codec_type,nb_read_frames,duration', '-of', 'json', output_path],
+        capture_output=True, text=True)
+    if process.returncode != 0 or process.stderr.strip():
+        print(f"Smart cut check failed: decoder errors in {output_path}: {process.stderr.strip()[:500]}")
+        return False
+    streams = {s['codec_type']: s for s in json.loads(process.stdout).get('streams', [])}
+    frames = int(streams.get('video', {}).get('nb_read_frames', 0))
+    fps = frame_rate(video_stream)
+    expected = duration * fps
+    if abs(frames - expected) > max(2, 0.1 * fps):
+        print(f"Smart cut check failed: {frames} frames, expected about {expected:.0f}.")
+        return False
+    process = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time',
+         '-of', 'csv=p=0', output_path],
+        capture_output=True, text=True)
+    times = sorted(float(t) for t in process.stdout.split() if t not in ('', 'N/A'))
+    steps = [b - a for a, b in zip(times, times[1:])]
+    if steps and max(steps) > 1.5 / fps:
+        print(f"Smart cut check failed: {max(steps):.3f}s gap in the video at {times[steps.index(max(steps))]:.3f}s.")
+        return False
+    if 'audio' in streams:
+        gap = abs(float(streams['audio'].get('duration', 0)) - float(streams['video'].get('duration', 0)))
+        if gap > 0.1:
+            print(f"Smart cut check failed: audio and video lengths differ by {gap:.3f}s.")
+            return False
+    return True
+
+def cut_reencode(input_path, output_path, start, end, fade):
+    """Cuts the segment with a single full re-encode and fades on both ends."""
+    encode_piece(input_path, output_path, start, end - start, fade, True, True,
+                 VIDEO_ENCODERS['h264'], AUDIO_ENCODERS['aac'])
+
+def cut_smart(input_path, output_path, start, end, fade):
+    """
+    Cuts the segment re-encoding only the head and tail that hold the fades.
+
+    The video is stream-copied from the first keyframe after the fade-in to
+    the last keyframe before the fade-out, and the head and tail are encoded
+    with the source's profile and level. H.264/HEVC pieces are written as NUT
+    with the parameter sets repeated in-band (Annex B), and the MP4 is tagged
+    avc3/hev1, so each piece keeps its own SPS/PPS instead of the concat
+    demuxer applying the head's to the copied middle. The audio is re-encoded
+    over the whole cut in one pass (with both fades), so there are no audio
+    joins that could leave gaps or overlaps. The result is decoded with
+    ffprobe before it is accepted.
+
+    Returns:
+        False if the segment cannot be smart-cut (unsupported codec, no usable
+        keyframes or a failed check), in which case nothing is written.
+    """
+    video_stream, audio_stream = probe_streams(input_path)
+    if not video_stream or video_stream['codec_name'] not in VIDEO_ENCODERS:
+        print("Smart cut not possible: unsupported or missing video codec.")
+        return False
+    if audio_stream and audio_stream['codec_name'] not in AUDIO_ENCODERS:
+        print(f"Smart cut not possible: unsupported audio codec '{audio_stream['codec_name']}'.")
+        return False
+
+    keyframes = keyframe_times(input_path, start, end)
+    head_end = next((k for k in keyframes if k >= start + fade), None)
+    tail_start = next((k for k in reversed(keyframes) if k <= end - fade), None)
+    if head_end is None or tail_start is None or tail_start <= head_end:
+        print("Smart cut not possible: no keyframes between the fades.")
+        return False
+
+    video_codec = VIDEO_ENCODERS[video_stream['codec_name']]
+    audio_codec = AUDIO_ENCODERS[audio_stream['codec_name']] if audio_stream else []
+    annexb = ANNEXB_CODECS.get(video_stream['codec_name'])
+    piece_format = 'nut' if annexb else 'mp4'
+    piece_args = ['-f', piece_format] + (['-bsf:v', IN_BAND_HEADERS_BSF] if annexb else [])
+    base, _ = os.path.splitext(output_path)
+    head_file = f'{base}_temp_head.{piece_format}'
+    middle_file = f'{base}_temp_middle.{piece_format}'
+    tail_file = f'{base}_temp_tail.{piece_format}'
+    audio_file = f'{base}_temp_audio.mka'
+    list_file = f'{base}_temp_concat.txt'
+    temp_files = [head_file, middle_file, tail_file, audio_file, list_file]
+
+    # The joins must not repeat or drop a frame, so the head and the middle
+    # are cut by frame count rather than by -t: a -t ending on a keyframe
+    # includes it, and a stream copy applies -t to decode timestamps, which
+    # lag behind with B-frames. A copy seek lands on the keyframe at or before
+    # -ss, so the middle seeks half a frame past head_end; rounding can then
+    # never fall back to the previous keyframe.
+    fps = frame_rate(video_stream)
+    head_frames = math.floor((head_end - start) * fps + 1e-3)
+    middle_frames = round((tail_start - head_end) * fps)
+    middle_start = head_end + 0.5 / fps
+
+    try:
+        encode_piece(input_path, head_file, start, head_end - start, fade, True, False,
+                     video_codec, [], video_stream, None, piece_args, head_frames)
+        middle_command = ['ffmpeg', '-y', '-ss', f'{middle_start:.6f}', '-i', input_path,
+                          '-frames:v', str(middle_frames), '-map', '0:v:0', '-c', 'copy']
+        if annexb:
+            middle_command += ['-bsf:v', annexb[0]]
+        run_command(middle_command + ['-avoid_negative_ts', 'make_zero', '-f', piece_format, middle_file])
+        encode_piece(input_path, tail_file, tail_start, end - tail_start, fade, False, True,
+                     video_codec, [], video_stream, None, piece_args)
+
+        # Exact piece durations: the demuxer would otherwise take them from the
+        # container, which counts the B-frame delay and leaves a gap at each join.
+        with open(list_file, 'w') as f:
+            for piece, frames in ((head_file, head_frames), (middle_file, middle_frames), (tail_file, None)):
+                path = os.path.abspath(piece).replace("'", "'\\''")
+                f.write(f"file '{path}'\n")
+                if frames:
+                    f.write(f"duration {frames / fps:.6f}\n")
+        command = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_file]
+        if audio_stream:
+            encode_piece(input_path, audio_file, start, end - start, fade, True, True,
+                         [], audio_codec, None, audio_stream, ['-f', 'matroska'])
+            command += ['-i', audio_file, '-map', '0:v:0', '-map', '1:a:0']
+        command += ['-c', 'copy']
+        if annexb:
+            command += ['-tag:v', annexb[1]]
+        command += ['-movflags', '+faststart', output_path]
+        run_command(command)
+    except subprocess.CalledProcessError:
+        print("Smart cut failed.")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False
+    finally:
+        for f in temp_files:
+            if os.path.exists(f):
+                os.remove(f)
+
+    if not verify_cut(output_path, end - start, video_stream):
+        os.remove(output_path)
+        return False
+
+    print(f"Smart cut: re-encoded {head_end - start:.1f}s + {end - tail_start:.1f}s of video, copied {tail_start - head_end:.1f}s.")
+    return True
+
+def cut_video(input_path, output_path, start_time, end_time, fade=2.0, mode="smart"):
+    """
+    Cuts [start_time, end_time] from the input with a fade-in and fade-out on video and audio.
+
+    Args:
+        input_path: Path to the source video.
+        output_path: Path of the MP4 to write.
+        start_time: Start of the cut (HH:MM:SS[.mmm] or seconds).
+        end_time: End of the cut (HH:MM:SS[.mmm] or seconds).
+        fade: Fade duration in seconds on each end.
+        mode: "smart" re-encodes only the faded head and tail and falls back to
+            "reencode" (single full encode) when that is not possible or the
+            joined file fails its check.
+    """
+    start = to_seconds(start_time)
+    end = to_seconds(end_time)
+    if end - start <= 2 * fade:
+        raise ValueError(f"Cut is too short ({end - start:.1f}s) for {fade}s fades.")
+
+    if mode == "smart" and cut_smart(input_path, output_path, start, end, fade):
+        return
+    cut_reencode(input_path, output_path, start, end, fade)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cut a segment from a video with fade-in and fade-out.")
+    parser.add_argument("input_path", help="Path to the source video.")
+    parser.add_argument("output_path", help="Path of the MP4 cut to write.")
+    parser.add_argument("start_time", help="Start time (HH:MM:SS).")
+    parser.add_argument("end_time", help="End time (HH:MM:SS).")
+    parser.add_argument("--fade", type=float, default=2.0, help="Fade duration in seconds (default: 2).")
+    parser.add_argument("--mode", default="smart", choices=["smart", "reencode"], help="Only re-encode the faded ends (smart) or the whole segment (reencode).")
+
+    args = parser.parse_args()
+
+    cut_video(args.input_path, args.output_path, args.start_time, args.end_time, args.fade, args.mode)
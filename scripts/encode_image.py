@@ -0,0 +1,105 @@
+import io
+import os
+import argparse
+import mimetypes
+from PIL import Image
+
+# YouTube rejects custom thumbnails above 2 MB.
+YOUTUBE_THUMBNAIL_MAX_BYTES = 2 * 1024 * 1024
+
+FORMATS = {"jpeg": ("JPEG", ".jpg"), "jpg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+
+def _encode(img, pil_format, quality):
+    buffer = io.BytesIO()
+    if pil_format == "JPEG":
+        img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(buffer, pil_format, quality=quality, method=4)
+    return buffer.getvalue()
+
+def encode_to_budget(img, max_bytes, image_format="jpeg", min_quality=70, max_quality=95, downscale=True):
+    """
+    Encodes img as JPEG or WebP at the highest quality that fits in max_bytes.
+
+    Quality is chosen by binary search between min_quality and max_quality. If
+    even min_quality does not fit, the image is scaled down in 10% steps
+    rather than dropping below the quality floor. With downscale=False a
+    ValueError is raised instead, for outputs that must keep their size.
+
+    Returns:
+        (data, quality, size) - the encoded bytes, the quality used and the final (width, height).
+    """
+    pil_format = FORMATS[image_format.lower()][0]
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    while True:
+        low, high = min_quality, max_quality
+        best = None
+        while low <= high:
+            quality = (low + high) // 2
+            data = _encode(img, pil_format, quality)
+            if len(data) <= max_bytes:
+                best = (data, quality)
+                low = quality + 1
+            else:
+                high = quality - 1
+        if best:
+            return best[0], best[1], img.size
+        if not downscale:
+            raise ValueError(f"{img.width}x{img.height} does not fit in {max_bytes / 1024:.0f} KB "
+                             f"at quality {min_quality} or above.")
+        if min(img.size) <= 64:
+            # Nothing sensible fits; return the floor-quality encoding.
+            return _encode(img, pil_format, min_quality), min_quality, img.size
+        img = img.resize((round(img.width * 0.9), round(img.height * 0.9)), Image.LANCZOS)
+
+def encode_file(input_path, output_path=None, max_bytes=YOUTUBE_THUMBNAIL_MAX_BYTES, image_format="jpeg", min_quality=70):
+    """
+    Re-encodes an image file within a byte budget.
+
+    Args:
+        output_path: Defaults to the input path with the format's extension.
+
+    Returns:
+        The output path.
+    """
+    extension = FORMATS[image_format.lower()][1]
+    output_path = output_path or os.path.splitext(input_path)[0] + extension
+    with Image.open(input_path) as img:
+        data, quality, size = encode_to_budget(img, max_bytes, image_format, min_quality)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    print(f"Encoded {input_path} ({os.path.getsize(input_path) / 1024:.0f} KB) -> {output_path} "
+          f"({len(data) / 1024:.0f} KB, quality {quality}, {size[0]}x{size[1]})")
+    return output_path
+
+def image_mime_type(path):
+    """MIME type for an image path, based on its extension."""
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def prepare_upload_image(path, max_bytes, image_format="jpeg"):
+    """
+    Returns (path, mime_type) of an image ready to upload.
+
+    Images already within max_bytes are used as they are; larger ones are
+    re-encoded next to the original as "<name>.upload.jpg" (or .webp).
+    """
+    if max_bytes is None or os.path.getsize(path) <= max_bytes:
+        return path, image_mime_type(path)
+    extension = FORMATS[image_format.lower()][1]
+    output_path = f"{os.path.splitext(path)[0]}.upload{extension}"
+    encode_file(path, output_path, max_bytes, image_format)
+    return output_path, image_mime_type(output_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encode an image as JPEG/WebP at the best quality that fits a byte budget.")
+    parser.add_argument("input_path", help="Image to encode.")
+    parser.add_argument("output_path", nargs="?", help="Output file (default: input name with the format's extension).")
+    parser.add_argument("--max_kb", type=int, default=YOUTUBE_THUMBNAIL_MAX_BYTES // 1024, help="Byte budget in KB (default: 2048, YouTube's thumbnail limit).")
+    parser.add_argument("--format", default="jpeg", choices=["jpeg", "webp"], help="Output format (default: jpeg).")
+    parser.add_argument("--min_quality", type=int, default=70, help="Lowest quality allowed before scaling down instead (default: 70).")
+
+    args = parser.parse_args()
+
+    encode_file(args.input_path, args.output_path, args.max_kb * 1024, args.format, args.min_quality)
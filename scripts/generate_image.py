@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 from openai import OpenAI
 import requests
 
-def generate_image(prompt, output_path, model="gpt-image-1", size="1024x1024"):
+from image_cache import image_cache_key, get_cached_image, put_cached_image
+
+def generate_image(prompt, output_path, model="gpt-image-1", size="1024x1024", use_cache=True, raise_errors=False):
     """
     Generates an image from a text prompt using OpenAI's DALL-E API.
 
@@ -14,29 +16,43 @@ def generate_image(prompt, output_path, model="gpt-image-1", size="1024x1024"):
         prompt: The text prompt to generate the image from.
         output_path: The path to save the generated image to.
         model: The model to use for image generation. Can be "dall-e-3" or "gpt-image-1".
+        use_cache: Reuse a previously generated image for the same prompt, model and size.
+        raise_errors: Raise API errors (e.g. 429) instead of printing them, and
+            leave retries to the caller.
+
+    Returns:
+        True if the image was saved to output_path.
     """
+    supported_sizes = {
+        "dall-e-3": ["1024x1024", "1792x1024", "1024x1792"],
+        "gpt-image-1": ["1024x1024", "1024x1536", "1536x1024", "auto"]
+    }
+
+    if model in supported_sizes and size not in supported_sizes[model]:
+        print(f"Warning: Provided size '{size}' is not supported for model '{model}'. Using default size '{supported_sizes[model][0]}'.")
+        size = supported_sizes[model][0] # Use the first supported size as default
+
+    # A cache hit needs neither an API key nor a client.
+    cache_key = image_cache_key(prompt, model, size)
+    if use_cache and get_cached_image(cache_key, output_path):
+        return True
+
     load_dotenv() # Load environment variables from .env file
     api_key = os.getenv("OPENAI_API_KEY")
 
     if not api_key:
+        if raise_errors:
+            raise RuntimeError("OPENAI_API_KEY not found in .env file or environment variables.")
         print("Error: OPENAI_API_KEY not found in .env file or environment variables.")
-        return
+        return False
 
-    client = OpenAI(api_key=api_key)
+    # OPENAI_BASE_URL (read by the SDK) can point this at a local stub server.
+    client = OpenAI(api_key=api_key, max_retries=0) if raise_errors else OpenAI(api_key=api_key)
 
     try:
-        supported_sizes = {
-            "dall-e-3": ["1024x1024", "1792x1024", "1024x1792"],
-            "gpt-image-1": ["1024x1024", "1024x1536", "1536x1024", "auto"]
-        }
-
         if model not in supported_sizes:
             raise ValueError(f"Unsupported model: {model}")
 
-        if size not in supported_sizes[model]:
-            print(f"Warning: Provided size '{size}' is not supported for model '{model}'. Using default size '{supported_sizes[model][0]}'.")
-            size = supported_sizes[model][0] # Use the first supported size as default
-
         response = client.images.generate(
             model=model,
             prompt=prompt,
@@ -51,6 +67,8 @@ def generate_image(prompt, output_path, model="gpt-image-1", size="1024x1024"):
                 with open(output_path, "wb") as f:
                     f.write(base64.b64decode(b64_json))
                 print(f"Image saved to {output_path}")
+                put_cached_image(cache_key, output_path)
+                return True
             else:
                 print("No base64 image data found in the API response.")
         else: # DALL-E 3 returns a URL
@@ -61,11 +79,16 @@ def generate_image(prompt, output_path, model="gpt-image-1", size="1024x1024"):
                 with open(output_path, "wb") as f:
                     f.write(image_response.content)
                 print(f"Image saved to {output_path}")
+                put_cached_image(cache_key, output_path)
+                return True
             else:
                 print("No image URL found in the API response.")
 
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error generating image with OpenAI: {e}")
+    return False
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate an image from a text prompt using OpenAI's DALL-E API.")
@@ -73,6 +96,7 @@ if __name__ == "__main__":
     parser.add_argument("output_path", type=str, help="The path to save the generated image to.")
     parser.add_argument("--model", type=str, default="gpt-image-1", choices=["dall-e-3", "gpt-image-1"], help="The model to use for image generation.")
     parser.add_argument("--size", type=str, default="1024x1024", help="The size of the generated image (e.g., '1024x1024', '1792x1024').")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Always call the API, ignoring cached images.")
     args = parser.parse_args()
 
-    generate_image(args.prompt, args.output_path, args.model, args.size)
+    generate_image(args.prompt, args.output_path, args.model, args.size, args.use_cache)
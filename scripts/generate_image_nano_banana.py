@@ -4,10 +4,49 @@ import base64
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
-from PIL import Image
-import io
+from PIL import Image, ImageOps
+import time
+import threading
 
-def generate_image(prompt, output_path, model_name="gemini-2.5-flash-image", reference_image_path="workflows/Foto-3x4.jpg", aspect_ratio="16:9"):
+from cache_dir import cache_path
+from image_cache import image_cache_key, get_cached_image, put_cached_image
+from encode_image import image_mime_type
+from common import file_hash
+
+# Gemini downsamples input images anyway; larger references only cost upload time.
+REFERENCE_MAX_SIDE = 1024
+REFERENCE_QUALITY = 90
+
+_reference_memo = {}
+_reference_lock = threading.Lock()
+
+def prepare_reference_image(path, max_side=REFERENCE_MAX_SIDE, quality=REFERENCE_QUALITY):
+    """
+    Returns the reference image downsized to max_side and re-encoded as JPEG.
+
+    The result is cached in .cache/references/ keyed by the file hash, and kept
+    in memory so a batch decodes and hashes the photo only once.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size, max_side, quality)
+    with _reference_lock:
+        if memo_key in _reference_memo:
+            return _reference_memo[memo_key]
+
+        cached = cache_path("references", f"{file_hash(path)[:32]}_{max_side}_q{quality}.jpg")
+        if not os.path.exists(cached):
+            with Image.open(path) as img:
+                img.draft("RGB", (max_side, max_side))
+                img = ImageOps.exif_transpose(img).convert("RGB")
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+                img.save(f"{cached}.tmp", "JPEG", quality=quality, optimize=True)
+            os.replace(f"{cached}.tmp", cached)
+        with open(cached, "rb") as f:
+            data = f.read()
+        _reference_memo[memo_key] = data
+        return data
+
+def generate_image(prompt, output_path, model_name="gemini-2.5-flash-image", reference_image_path="workflows/Foto-3x4.jpg", aspect_ratio="16:9", use_cache=True, raise_errors=False, engine="api", text=None, preprocess_reference=True):
     """
     Generates an image from a text prompt and a reference image using Google's Gemini API (google-genai SDK).
 
@@ -17,26 +56,62 @@ def generate_image(prompt, output_path, model_name="gemini-2.5-flash-image", ref
         model_name: The model to use (default: "gemini-2.5-flash-image").
         reference_image_path: Path to the reference image (e.g., user's photo).
         aspect_ratio: Aspect ratio of the generated image (default: "16:9").
+        use_cache: Reuse a previously generated image for the same prompt, model,
+            aspect ratio, reference image bytes and reference preprocessing.
+        raise_errors: Raise API errors (e.g. 429) instead of printing them, and
+            leave retries to the caller.
+        engine: "api" calls Gemini; "local" composes a template thumbnail with
+            compose_thumbnail.py instead (milliseconds, no API call).
+        text: Overlay text for the local engine (default: the prompt).
+        preprocess_reference: Send the cached, downsized JPEG of the reference
+            image instead of the full-resolution file.
+
+    Returns:
+        True if the image was saved to output_path.
     """
+    if engine == "local":
+        from compose_thumbnail import aspect_size, compose_thumbnail
+        compose_thumbnail(text or prompt, output_path, reference_image_path, aspect_size(aspect_ratio))
+        return True
+
+    # The model sees the processed reference, so the processing is part of the key.
+    reference_variant = ["jpeg", REFERENCE_MAX_SIDE, REFERENCE_QUALITY] if preprocess_reference else "raw"
+    cache_key = image_cache_key(prompt, model_name, aspect_ratio, reference_image_path, reference_variant)
+    if use_cache and get_cached_image(cache_key, output_path):
+        return True
+
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
 
     if not api_key:
+        if raise_errors:
+            raise RuntimeError("GOOGLE_API_KEY not found in .env file or environment variables.")
         print("Error: GOOGLE_API_KEY not found in .env file or environment variables.")
         print("Please get an API key from https://aistudio.google.com/ and set it.")
-        return
+        return False
 
-    client = genai.Client(api_key=api_key)
+    # GOOGLE_API_BASE_URL can point this at a local stub server (see image_stub_server.py).
+    base_url = os.getenv("GOOGLE_API_BASE_URL")
+    if base_url:
+        client = genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+    else:
+        client = genai.Client(api_key=api_key)
 
     try:
         inputs = [prompt]
         
         if reference_image_path:
             if os.path.exists(reference_image_path):
-                print(f"Loading reference image from: {reference_image_path}")
                 try:
-                    img = Image.open(reference_image_path)
-                    inputs.append(img)
+                    if preprocess_reference:
+                        data = prepare_reference_image(reference_image_path)
+                        inputs.append(types.Part.from_bytes(data=data, mime_type="image/jpeg"))
+                    else:
+                        with open(reference_image_path, "rb") as f:
+                            data = f.read()
+                        inputs.append(types.Part.from_bytes(data=data, mime_type=image_mime_type(reference_image_path)))
+                    print(f"Reference image: {reference_image_path} ({len(data) / 1024:.0f} KB sent, "
+                          f"{os.path.getsize(reference_image_path) / 1024:.0f} KB on disk)")
                 except Exception as e:
                     print(f"Error loading reference image: {e}")
             else:
@@ -49,17 +124,19 @@ def generate_image(prompt, output_path, model_name="gemini-2.5-flash-image", ref
             image_config = types.ImageConfig(aspect_ratio=aspect_ratio)
             config = types.GenerateContentConfig(image_config=image_config)
             
+            started = time.perf_counter()
             response = client.models.generate_content(
                 model=model_name,
                 contents=inputs,
                 config=config
             )
+            print(f"Gemini responded in {time.perf_counter() - started:.1f}s")
         except Exception as e:
-            if "429" in str(e):
+            if "429" in str(e) and not raise_errors:
                 print("\nError: Quota exceeded (429).")
                 print("You may have hit the rate limit for this model.")
                 print("Please check your plan and billing details at https://aistudio.google.com/")
-                return
+                return False
             else:
                 raise e
         
@@ -86,16 +163,23 @@ def generate_image(prompt, output_path, model_name="gemini-2.5-flash-image", ref
                                 with open(output_path, "wb") as f:
                                     f.write(image_data)
                                 print(f"Image saved to {output_path}")
+                                put_cached_image(cache_key, output_path)
                                 image_saved = True
                                 break
                     if image_saved: break
                 
         if not image_saved:
+            if raise_errors:
+                raise RuntimeError(f"No image generated. Response text: {response.text}")
             print("No image generated. Response text:")
             print(response.text)
+        return image_saved
 
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error generating image with Gemini: {e}")
+    return False
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate an image using Google's Gemini API.")
@@ -104,7 +188,11 @@ if __name__ == "__main__":
     parser.add_argument("--model", type=str, default="gemini-2.5-flash-image", help="The model to use (default: gemini-2.5-flash-image).")
     parser.add_argument("--reference_image", type=str, default="workflows/Foto-3x4.jpg", help="Path to reference image.")
     parser.add_argument("--aspect_ratio", type=str, default="16:9", help="Aspect ratio (default: 16:9).")
+    parser.add_argument("--engine", choices=["api", "local"], default="api", help="api: generate with Gemini; local: compose a template thumbnail with Pillow (default: api).")
+    parser.add_argument("--text", help="Overlay text for --engine local (default: the prompt).")
+    parser.add_argument("--raw_reference", dest="preprocess_reference", action="store_false", help="Send the reference image at full resolution instead of the cached downsized JPEG.")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Always call the API, ignoring cached images.")
     
     args = parser.parse_args()
 
-    generate_image(args.prompt, args.output_path, args.model, args.reference_image, args.aspect_ratio)
+    generate_image(args.prompt, args.output_path, args.model, args.reference_image, args.aspect_ratio, args.use_cache, engine=args.engine, text=args.text, preprocess_reference=args.preprocess_reference)
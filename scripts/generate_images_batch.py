@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average,
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def error_status(e):
+    """HTTP status of an SDK error (google-genai, openai, requests), or None."""
+    for attr in ("code", "status_code"):
+        value = getattr(e, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(e, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def transient_error_types():
+    """
+    Connection and timeout exception types of the HTTP clients in use.
+
+    Only modules the generators already imported are consulted: google-genai
+    raises httpx errors, openai wraps them in APIConnectionError (and its
+    APITimeoutError subclass), and requests has its own hierarchy.
+    """
+    types = [ConnectionError, TimeoutError]
+    httpx = sys.modules.get("httpx")
+    if httpx:
+        types.append(httpx.TransportError)
+    openai = sys.modules.get("openai")
+    if openai:
+        types.append(openai.APIConnectionError)
+    requests = sys.modules.get("requests")
+    if requests:
+        types += [requests.ConnectionError, requests.Timeout]
+    return tuple(types)
+
+def is_retryable(e):
+    status = error_status(e)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(e, transient_error_types())
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def generate_one(item, use_cache):
+    """Runs a single manifest item through the matching generator, raising on API errors."""
+    engine = item.get("engine", "gemini")
+    if engine == "openai":
+        from generate_image import generate_image
+        return generate_image(item["prompt"], item["output_path"], item.get("model", "gpt-image-1"),
+                              item.get("size", "1024x1024"), use_cache=use_cache, raise_errors=True)
+    if engine == "local":
+        from compose_thumbnail import aspect_size, compose_thumbnail
+        compose_thumbnail(item.get("text") or item["prompt"], item["output_path"], item.get("reference_image", "workflows/Foto-3x4.jpg"),
+                          aspect_size(item.get("aspect_ratio", "16:9")), item.get("background"))
+        return True
+    if engine == "gemini":
+        from generate_image_nano_banana import generate_image
+        return generate_image(item["prompt"], item["output_path"], item.get("model", "gemini-2.5-flash-image"),
+                              item.get("reference_image", "workflows/Foto-3x4.jpg"), item.get("aspect_ratio", "16:9"),
+                              use_cache=use_cache, raise_errors=True)
+    raise ValueError(f"Unsupported engine: {engine}")
+
+def run_item(item, bucket, max_retries, use_cache, backoff_base):
+    """Generates one image, retrying 429/5xx and connection errors with backoff."""
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        # Local compositions do not touch the API, so they skip the rate limit.
+        if item.get("engine") != "local":
+            bucket.acquire()
+        try:
+            # Generators return False (without raising) when the API sent no image.
+            if generate_one(item, use_cache) is False or not os.path.exists(item["output_path"]):
+                raise RuntimeError(f"No image was written to {item['output_path']}.")
+            return {"output_path": item["output_path"], "status": "done", "attempts": attempt + 1,
+                    "elapsed": time.perf_counter() - started, "error": None}
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                return {"output_path": item["output_path"], "status": "failed", "attempts": attempt + 1,
+                        "elapsed": time.perf_counter() - started, "error": str(e)}
+            delay = backoff_delay(attempt, backoff_base)
+            print(f"{item['output_path']}: {error_status(e) or type(e).__name__}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+def generate_batch(items, concurrency=3, rate=1.0, burst=None, max_retries=5, use_cache=True, backoff_base=1.0):
+    """
+    Generates every manifest item concurrently.
+
+    Args:
+        items: List of dicts with prompt, output_path and optional engine
+            ("gemini", "openai" or "local"), model, size, aspect_ratio,
+            reference_image, and text/background for the local compositor.
+        concurrency: Maximum requests in flight.
+        rate: Average requests started per second (token bucket refill rate).
+        burst: Token bucket capacity (default: concurrency).
+        max_retries: Retries per item on 429/5xx and connection errors.
+
+    Returns:
+        A list of result dicts in manifest order.
+    """
+    bucket = TokenBucket(rate, burst or concurrency)
+    started = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(run_item, item, bucket, max_retries, use_cache, backoff_base): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print(f"{result['output_path']}: {result['status']} after {result['attempts']} attempt(s) in {result['elapsed']:.1f}s")
+    total = time.perf_counter() - started
+
+    ordered = [results[i] for i in range(len(items))]
+    done = sum(1 for r in ordered if r["status"] == "done")
+    retries = sum(r["attempts"] - 1 for r in ordered)
+    print(f"\n{done}/{len(items)} images generated in {total:.1f}s ({retries} retries, concurrency {concurrency}, {rate}/s).")
+    for r in ordered:
+        if r["error"]:
+            print(f"  {r['output_path']}: {r['error']}")
+    return ordered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate many images concurrently from a JSON manifest.")
+    parser.add_argument("manifest", help='JSON list of {"prompt", "output_path", "engine", "model", "size", "aspect_ratio", "reference_image", "text", "background"}.')
+    parser.add_argument("--concurrency", type=int, default=3, help="Maximum requests in flight (default: 3).")
+    parser.add_argument("--rate", type=float, default=1.0, help="Average requests per second (default: 1).")
+    parser.add_argument("--burst", type=int, help="Requests allowed in a burst (default: --concurrency).")
+    parser.add_argument("--max_retries", type=int, default=5, help="Retries per image on 429/5xx (default: 5).")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Base backoff delay in seconds (default: 1).")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Always call the API, ignoring cached images.")
+
+    args = parser.parse_args()
+
+    with open(args.manifest, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    results = generate_batch(items, args.concurrency, args.rate, args.burst, args.max_retries, args.use_cache, args.backoff)
+    if any(r["status"] != "done" for r in results):
+        sys.exit(1)
@@ -1,77 +1,224 @@
+import os
+import argparse
 import subprocess
-import sys
+import re
+import time
 import textwrap
 
+import subtitles
+from common import FONT_FILE
+
+# Subtitle document for the 1080x1920 Shorts canvas (bottom-centred, 300px margin).
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1080
+PlayResY: 1920
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,36,&H00FFFFFF,&H00000000,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,300,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
 def run_command(command):
-    """Runs a command and prints its output."""
-    print(f"Executing: {command}")
-    process = subprocess.run(command, shell=True, capture_output=True, text=True)
+    """Runs a command and prints its output.
+
+    Accepts either a shell string or an argument list (no shell involved).
+    """
+    printable = command if isinstance(command, str) else subprocess.list2cmdline(command)
+    print(f"Executing: {printable}")
+    process = subprocess.run(command, shell=isinstance(command, str), capture_output=True, text=True)
     if process.returncode != 0:
-        print(f"Error executing command: {command}")
+        print(f"Error executing command: {printable}")
         print(process.stderr)
         raise subprocess.CalledProcessError(process.returncode, command)
     print(process.stdout)
 
-def generate_short(output_dir, input_video_path, srt_path, short_number, start_time, end_time, title):
-    """Generates a single YouTube Short with title and subtitles."""
+def format_ass_time(ms):
+    """Formats milliseconds as an ASS timestamp (H:MM:SS.cc), clamping negatives to zero."""
+    centiseconds = max(0, ms // 10)
+    h, rem = divmod(centiseconds, 360000)
+    m, rem = divmod(rem, 6000)
+    s, cs = divmod(rem, 100)
+    return f"{h}:{m:02}:{s:02}.{cs:02}"
+
+def ass_text(text):
+    """Converts SRT cue text (basic HTML tags, newlines) to ASS dialogue text."""
+    for tag in ("i", "b", "u"):
+        text = text.replace(f"<{tag}>", f"{{\\{tag}1}}").replace(f"</{tag}>", f"{{\\{tag}0}}")
+    text = re.sub(r"<[^>]+>", "", text)
+    return text.replace("\n", "\\N")
+
+def write_ass(cues, ass_path):
+    """Writes subtitles.Cue objects as a 1080x1920 ASS file with the Shorts subtitle style."""
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(ASS_HEADER)
+        for cue in cues:
+            f.write(f"Dialogue: 0,{format_ass_time(cue.start)},{format_ass_time(cue.end)},Default,,0,0,0,,{ass_text(cue.text)}\n")
+
+def prepare_subtitles(srt_path, start_time, end_time, ass_path, cue_list=None):
+    """
+    Writes the Short's ASS file with only the cues inside [start_time, end_time),
+    retimed to the cut start.
+
+    Pass a subtitles.CueList to share one parsed SRT across many Shorts.
+    """
+    start = subtitles.parse_timestamp(start_time)
+    end = subtitles.parse_timestamp(end_time)
+    if cue_list is None:
+        cue_list = subtitles.read_cues(srt_path)
+    write_ass(cue_list.window(start, end), ass_path)
+
+def build_filter_graph(ass_file, title_file):
+    """
+    Builds the single-pass filter graph for a Short.
+
+    The input is expected to be already trimmed with -ss/-to, so the
+    subtitles (retimed to the cut start) line up with the frame timestamps.
+    Subtitles are burned in before the speed-up, exactly like the multi-step path.
+    """
+    video_chain = ",".join([
+        "scale=1080:-2",
+        "pad=1080:1920:-1:(1920-ih)/2:color=black",
+        f"subtitles=filename='{ass_file}'",
+        "setpts=PTS/2.0",
+        f"drawtext=textfile='{title_file}':fontfile='{FONT_FILE}':fontsize=70:fontcolor=yellow:x=(w-text_w)/2:y=100",
+    ])
+    return f"[0:v]{video_chain}[v];[0:a]atempo=2.0[a]"
+
+def render_single_pass(input_video_path, start_time, end_time, ass_file, title_file, output_file, threads=None):
+    """Cuts, pads, subtitles, speeds up and titles the Short with a single encode."""
+    thread_args = ["-threads", str(threads), "-filter_threads", str(threads)] if threads else []
+    run_command([
+        "ffmpeg", "-y",
+        "-ss", start_time, "-to", end_time, "-i", input_video_path,
+        "-filter_complex", build_filter_graph(ass_file, title_file),
+        "-map", "[v]", "-map", "[a]",
+        "-c:v", "libx264", "-c:a", "aac", "-b:a", "128k",
+        *thread_args,
+        output_file,
+    ])
+    return {"encodes": 1, "intermediate_bytes": 0}
+
+def render_multi_step(input_video_path, start_time, end_time, ass_file, title_file, output_file, temp_prefix):
+    """Legacy render path: one encode per step, each through a temporary MP4."""
+    temp_cut_file = f'{temp_prefix}_temp_cut.mp4'
+    temp_padded_file = f'{temp_prefix}_temp_padded.mp4'
+    temp_subtitled_file = f'{temp_prefix}_temp_subtitled.mp4'
+    temp_spedup_file = f'{temp_prefix}_temp_spedup.mp4'
+    temp_files = [temp_cut_file, temp_padded_file, temp_subtitled_file, temp_spedup_file]
+
+    try:
+        run_command(f'ffmpeg -y -ss {start_time} -to {end_time} -i "{input_video_path}" -c:v libx264 -c:a aac -b:a 128k "{temp_cut_file}"')
+        run_command(f'ffmpeg -y -i "{temp_cut_file}" -filter_complex "[0:v]scale=1080:-2,pad=1080:1920:-1:(1920-ih)/2:color=black[v]" -map "[v]" -map 0:a "{temp_padded_file}"')
+        run_command(f'ffmpeg -y -i "{temp_padded_file}" -vf "subtitles=filename=\'{ass_file}\'" -c:a copy "{temp_subtitled_file}"')
+        run_command(f'ffmpeg -y -i "{temp_subtitled_file}" -filter_complex "[0:v]setpts=PTS/2.0[v];[0:a]atempo=2.0[a]" -map "[v]" -map "[a]" "{temp_spedup_file}"')
+        command = [
+            "ffmpeg", "-y", "-i", temp_spedup_file,
+            "-filter_complex", f"'drawtext=textfile={title_file}:fontfile={FONT_FILE}:fontsize=70:fontcolor=yellow:x=(w-text_w)/2:y=100'",
+            "-c:a", "copy",
+            output_file
+        ]
+        run_command(" ".join(command))
+        # Every intermediate is written once and read back once by the next step.
+        intermediate_bytes = sum(os.path.getsize(f) for f in temp_files)
+    finally:
+        for f in temp_files:
+            if os.path.exists(f):
+                os.remove(f)
+
+    return {"encodes": 5, "intermediate_bytes": intermediate_bytes}
+
+def generate_short(output_dir, input_video_path, srt_path, short_number, start_time, end_time, title, mode="single", output_file=None, threads=None, cue_list=None):
+    """
+    Generates a single YouTube Short with title and subtitles.
+
+    Args:
+        mode: "single" builds one filter graph and encodes once (default),
+            "multi" uses the legacy five-encode path as a fallback.
+        output_file: Overrides the default {output_dir}/short{N}.mp4 path.
+        threads: Caps the ffmpeg encoder/filter threads (single mode only).
+        cue_list: Pre-parsed subtitles.CueList of srt_path, shared by batch renders.
+
+    The Short is rendered to a temporary file and renamed into place, so an
+    existing output file is always complete.
+
+    Returns:
+        A dict with the render mode, elapsed seconds, number of encodes and
+        intermediate bytes written to disk.
+    """
 
     shorts_dir = output_dir
     temp_title_file = f'{shorts_dir}/temp_title_{short_number}.txt'
-    temp_srt_file = f'{shorts_dir}/short{short_number}_temp_sub.srt'
     temp_ass_file = f'{shorts_dir}/short{short_number}_temp_sub.ass'
-    temp_cut_file = f'{shorts_dir}/short{short_number}_temp_cut.mp4'
-    temp_padded_file = f'{shorts_dir}/short{short_number}_temp_padded.mp4'
-    temp_subtitled_file = f'{shorts_dir}/short{short_number}_temp_subtitled.mp4'
-    temp_spedup_file = f'{shorts_dir}/short{short_number}_temp_spedup.mp4'
-    output_file = f'{shorts_dir}/short{short_number}.mp4'
+    if output_file is None:
+        output_file = f'{shorts_dir}/short{short_number}.mp4'
+    temp_output_file = f'{shorts_dir}/short{short_number}_temp_render.mp4'
+
+    started = time.perf_counter()
 
     # Create title file
     with open(temp_title_file, "w") as f:
         f.write("\n".join(textwrap.wrap(title, width=25)))
 
-    # Adjust SRT timestamps
-    run_command(f'python3 scripts/adjust_srt.py "{srt_path}" {start_time} "{temp_srt_file}"')
-
-    # Convert SRT to ASS
-    run_command(f'ffmpeg -i "{temp_srt_file}" "{temp_ass_file}"')
-
-    # Modify ASS file
-    with open(temp_ass_file, "r+") as f:
-        content = f.read()
-        content = content.replace("PlayResX: 384", "PlayResX: 1080")
-        content = content.replace("PlayResY: 288", "PlayResY: 1920")
-        content = content.replace("Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,1", "Style: Default,Arial,36,&H00FFFFFF,&H00000000,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,300,1")
-        f.seek(0)
-        f.write(content)
-        f.truncate()
-
-    # Run ffmpeg commands
-    run_command(f'ffmpeg -y -ss {start_time} -to {end_time} -i "{input_video_path}" -c:v libx264 -c:a aac -b:a 128k "{temp_cut_file}"')
-    run_command(f'ffmpeg -y -i "{temp_cut_file}" -filter_complex "[0:v]scale=1080:-2,pad=1080:1920:-1:(1920-ih)/2:color=black[v]" -map "[v]" -map 0:a "{temp_padded_file}"')
-    run_command(f'ffmpeg -y -i "{temp_padded_file}" -vf "subtitles=filename=\'{temp_ass_file}\'" -c:a copy "{temp_subtitled_file}"')
-    run_command(f'ffmpeg -y -i "{temp_subtitled_file}" -filter_complex "[0:v]setpts=PTS/2.0[v];[0:a]atempo=2.0[a]" -map "[v]" -map "[a]" "{temp_spedup_file}"')
-    command = [
-        "ffmpeg", "-y", "-i", temp_spedup_file,
-        "-filter_complex", f"'drawtext=textfile={temp_title_file}:fontfile=/System/Library/Fonts/Supplemental/Arial Bold.ttf:fontsize=70:fontcolor=yellow:x=(w-text_w)/2:y=100'",
-        "-c:a", "copy",
-        output_file
-    ]
-    run_command(" ".join(command))
-
-    # Clean up temporary files
-    run_command(f'rm "{temp_srt_file}" "{temp_ass_file}" "{temp_title_file}" "{temp_cut_file}" "{temp_padded_file}" "{temp_subtitled_file}" "{temp_spedup_file}"')
+    try:
+        prepare_subtitles(srt_path, start_time, end_time, temp_ass_file, cue_list)
+
+        if mode == "single":
+            stats = render_single_pass(input_video_path, start_time, end_time, temp_ass_file, temp_title_file, temp_output_file, threads)
+        elif mode == "multi":
+            stats = render_multi_step(input_video_path, start_time, end_time, temp_ass_file, temp_title_file, temp_output_file, f'{shorts_dir}/short{short_number}')
+        else:
+            raise ValueError(f"Unsupported render mode: {mode}")
+        os.replace(temp_output_file, output_file)
+    finally:
+        # Clean up temporary files
+        for f in (temp_ass_file, temp_title_file, temp_output_file):
+            if os.path.exists(f):
+                os.remove(f)
+
+    stats["mode"] = mode
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+def compare_render_modes(output_dir, input_video_path, srt_path, short_number, start_time, end_time, title):
+    """Renders the same Short with both paths and prints wall-clock and disk I/O figures."""
+    results = []
+    cue_list = subtitles.read_cues(srt_path)
+    for mode in ("multi", "single"):
+        output_file = f'{output_dir}/short{short_number}_{mode}.mp4'
+        results.append(generate_short(output_dir, input_video_path, srt_path, short_number, start_time, end_time, title, mode=mode, output_file=output_file, cue_list=cue_list))
+
+    print(f"\nRender comparison for short {short_number} ({start_time} -> {end_time}):")
+    print(f"{'mode':<8}{'encodes':>9}{'seconds':>10}{'temp MB written':>17}{'temp MB read':>14}")
+    for r in results:
+        mb = r["intermediate_bytes"] / (1024 * 1024)
+        print(f"{r['mode']:<8}{r['encodes']:>9}{r['elapsed']:>10.1f}{mb:>17.1f}{mb:>14.1f}")
+    multi, single = results
+    if single["elapsed"] > 0:
+        print(f"Speed-up: {multi['elapsed'] / single['elapsed']:.2f}x, "
+              f"disk I/O saved: {2 * (multi['intermediate_bytes'] - single['intermediate_bytes']) / (1024 * 1024):.1f} MB")
+    return results
 
 if __name__ == "__main__":
-    if len(sys.argv) != 8:
-        print("Usage: python generate_short.py <output_dir> <input_video_path> <srt_path> <short_number> <start_time> <end_time> <title>")
-        sys.exit(1)
-
-    output_dir = sys.argv[1]
-    input_video_path = sys.argv[2]
-    srt_path = sys.argv[3]
-    short_number = sys.argv[4]
-    start_time = sys.argv[5]
-    end_time = sys.argv[6]
-    title = sys.argv[7]
-
-    generate_short(output_dir, input_video_path, srt_path, short_number, start_time, end_time, title)
+    parser = argparse.ArgumentParser(description="Generate a YouTube Short with title and subtitles.")
+    parser.add_argument("output_dir", help="Directory where the short is written.")
+    parser.add_argument("input_video_path", help="Path to the source video.")
+    parser.add_argument("srt_path", help="Path to the full-episode SRT file.")
+    parser.add_argument("short_number", help="Number of the short (used in the output file name).")
+    parser.add_argument("start_time", help="Start time of the cut (HH:MM:SS).")
+    parser.add_argument("end_time", help="End time of the cut (HH:MM:SS).")
+    parser.add_argument("title", help="Title drawn on top of the short.")
+    parser.add_argument("--mode", default="single", choices=["single", "multi"], help="Render with one encode (single) or the legacy five-step path (multi).")
+    parser.add_argument("--compare", action="store_true", help="Render with both modes and print a timing and disk I/O comparison.")
+
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_render_modes(args.output_dir, args.input_video_path, args.srt_path, args.short_number, args.start_time, args.end_time, args.title)
+    else:
+        generate_short(args.output_dir, args.input_video_path, args.srt_path, args.short_number, args.start_time, args.end_time, args.title, mode=args.mode)
@@ -0,0 +1,178 @@
+import os
+import re
+import csv
+import json
+import time
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from generate_short import generate_short
+from subtitles import read_cues
+
+def number_shorts(shorts):
+    """
+    Numbers the cuts that have no number after the highest explicit one, so an
+    unnamed cut never takes the number (and output file) of a named one.
+
+    Raises:
+        ValueError: If two cuts have the same number.
+    """
+    titles = {}
+    for short in shorts:
+        number = short['number']
+        if number is None:
+            continue
+        if number in titles:
+            raise ValueError(f"'{titles[number]}' and '{short['title']}' are both short {number}.")
+        titles[number] = short['title']
+    next_number = max(titles, default=0) + 1
+    for short in shorts:
+        if short['number'] is None:
+            short['number'] = next_number
+            next_number += 1
+    return shorts
+
+def parse_shorts_md(path):
+    """
+    Parses the shorts.md file written in Step 4 of the Shorts workflow.
+
+    Sections without a shortN.mp4 name are numbered after the named ones.
+
+    Returns:
+        A list of dicts with number, title, start_time and end_time.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    shorts = []
+    for section in re.split(r'^## ', content, flags=re.MULTILINE)[1:]:
+        title = section.splitlines()[0].strip()
+        start = re.search(r'Start Time:\s*(\S+)', section)
+        end = re.search(r'End Time:\s*(\S+)', section)
+        name = re.search(r'short(\d+)\.mp4', section)
+        if not start or not end:
+            print(f"Warning: Skipping '{title}' (missing start or end time).")
+            continue
+        shorts.append({
+            'number': int(name.group(1)) if name else None,
+            'title': title,
+            'start_time': start.group(1),
+            'end_time': end.group(1),
+        })
+    return number_shorts(shorts)
+
+def load_cut_list(path):
+    """Loads cuts from shorts.md, a JSON list or a CSV file (number,title,start_time,end_time)."""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    elif path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        return parse_shorts_md(path)
+
+    shorts = []
+    for row in rows:
+        shorts.append({
+            'number': int(row['number']) if row.get('number') else None,
+            'title': row['title'],
+            'start_time': row['start_time'],
+            'end_time': row['end_time'],
+        })
+    return number_shorts(shorts)
+
+def default_workers(threads, mode="single"):
+    """
+    Number of concurrent renders that keeps every core busy at `threads` ffmpeg threads each.
+
+    Multi mode does not pass threads to ffmpeg, so each render already uses every core.
+    """
+    if mode != "single" or not threads:
+        return 1
+    return max(1, (os.cpu_count() or 1) // threads)
+
+def render_batch(shorts_dir, input_video_path, srt_path, shorts, workers=None, threads=2, mode="single", force=False):
+    """
+    Renders every Short through a bounded worker pool.
+
+    A failed Short is reported and does not stop the others. Shorts whose
+    short{N}.mp4 already exists are skipped unless force is set.
+
+    Returns:
+        A list of result dicts (number, status, elapsed, error).
+    """
+    workers = workers or default_workers(threads, mode)
+    results = []
+    pending = []
+    for short in shorts:
+        output_file = os.path.join(shorts_dir, f"short{short['number']}.mp4")
+        if not force and os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            results.append({'number': short['number'], 'status': 'skipped', 'elapsed': 0.0, 'error': None})
+        else:
+            pending.append(short)
+
+    per_render = f"{threads} ffmpeg threads" if mode == "single" and threads else "all ffmpeg threads"
+    print(f"Rendering {len(pending)} shorts ({len(results)} already done) with {workers} workers x {per_render}...")
+
+    started = time.perf_counter()
+    # Parse the episode subtitles once; every Short only looks up its own window.
+    cue_list = read_cues(srt_path)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate_short, shorts_dir, input_video_path, srt_path, s['number'],
+                            s['start_time'], s['end_time'], s['title'], mode=mode, threads=threads, cue_list=cue_list): s
+            for s in pending
+        }
+        for future in as_completed(futures):
+            short = futures[future]
+            try:
+                stats = future.result()
+                results.append({'number': short['number'], 'status': 'done', 'elapsed': stats['elapsed'], 'error': None})
+                print(f"short{short['number']}.mp4 rendered in {stats['elapsed']:.1f}s")
+            except Exception as e:
+                results.append({'number': short['number'], 'status': 'failed', 'elapsed': 0.0, 'error': str(e)})
+                print(f"Error rendering short{short['number']}.mp4: {e}")
+    total = time.perf_counter() - started
+
+    results.sort(key=lambda r: r['number'])
+    print("\nSummary:")
+    for r in results:
+        line = f"  short{r['number']}.mp4: {r['status']}"
+        if r['status'] == 'done':
+            line += f" ({r['elapsed']:.1f}s)"
+        elif r['error']:
+            line += f" ({r['error']})"
+        print(line)
+    render_time = sum(r['elapsed'] for r in results)
+    print(f"Total wall-clock: {total:.1f}s, summed render time: {render_time:.1f}s")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every Short listed in shorts.md (or a JSON/CSV cut list) in parallel.")
+    parser.add_argument("shorts_dir", help="Directory where the shorts are written.")
+    parser.add_argument("input_video_path", help="Path to the source video.")
+    parser.add_argument("srt_path", help="Path to the full-episode SRT file.")
+    parser.add_argument("--cuts", help="Cut list: shorts.md, .json or .csv (default: {shorts_dir}/shorts.md).")
+    parser.add_argument("--workers", type=int, help="Concurrent renders (default: CPU count / --threads; 1 in multi mode).")
+    parser.add_argument("--threads", type=int, default=2, help="ffmpeg threads per render, single mode only (default: 2).")
+    parser.add_argument("--mode", default="single", choices=["single", "multi"], help="Render mode passed to generate_short.")
+    parser.add_argument("--force", action="store_true", help="Re-render shorts that already exist.")
+
+    args = parser.parse_args()
+
+    cuts_path = args.cuts or os.path.join(args.shorts_dir, "shorts.md")
+    try:
+        shorts = load_cut_list(cuts_path)
+    except ValueError as e:
+        print(f"Error in {cuts_path}: {e}")
+        sys.exit(1)
+    if not shorts:
+        print(f"No shorts found in {cuts_path}.")
+        sys.exit(1)
+
+    results = render_batch(args.shorts_dir, args.input_video_path, args.srt_path, shorts,
+                           workers=args.workers, threads=args.threads, mode=args.mode, force=args.force)
+    if any(r['status'] == 'failed' for r in results):
+        sys.exit(1)
@@ -0,0 +1,106 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+
+from cache_dir import cache_path, CACHE_DIR
+
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+# Least recently used images are evicted once the cache grows past this size.
+DEFAULT_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "500")) * 1024 * 1024
+
+def image_cache_key(prompt, model, size, reference_image_path=None, reference_variant=None):
+    """
+    Content hash identifying a generation request.
+
+    Args:
+        prompt: The text prompt.
+        model: The model name.
+        size: Size or aspect ratio requested.
+        reference_image_path: Optional reference image; its bytes (not its path) are hashed.
+        reference_variant: JSON-serialisable description of how the reference
+            is processed before it is sent (e.g. its downsized size and quality).
+    """
+    digest = hashlib.sha256()
+    parts = [prompt, model, size] + ([reference_variant] if reference_variant is not None else [])
+    digest.update(json.dumps(parts, ensure_ascii=False).encode("utf-8"))
+    if reference_image_path and os.path.exists(reference_image_path):
+        with open(reference_image_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _entry_path(key):
+    return os.path.join(IMAGE_CACHE_DIR, key[:2], key)
+
+def get_cached_image(key, output_path):
+    """
+    Copies the cached image for key to output_path.
+
+    Returns:
+        True on a hit, False on a miss.
+    """
+    entry = _entry_path(key)
+    if not os.path.exists(entry):
+        return False
+    shutil.copyfile(entry, output_path)
+    # Mark as recently used for LRU eviction.
+    os.utime(entry)
+    print(f"Image cache hit ({key[:12]}): saved to {output_path}")
+    return True
+
+def put_cached_image(key, image_path, max_bytes=DEFAULT_MAX_BYTES):
+    """Stores a generated image under key and evicts old entries beyond max_bytes."""
+    entry = cache_path("images", key[:2], key)
+    temp = f"{entry}.tmp"
+    shutil.copyfile(image_path, temp)
+    os.replace(temp, entry)
+    evict(max_bytes)
+
+def evict(max_bytes=DEFAULT_MAX_BYTES):
+    """Deletes least recently used images until the cache fits in max_bytes. Returns bytes freed."""
+    entries = []
+    for root, _, files in os.walk(IMAGE_CACHE_DIR):
+        for name in files:
+            # Skip images another process is still writing.
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Renamed or evicted since os.walk listed it.
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Already evicted by another process.
+        freed += size
+    return freed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the generated image cache.")
+    parser.add_argument("command", choices=["stats", "evict", "clear"], help="Show usage, evict down to --max_mb, or delete everything.")
+    parser.add_argument("--max_mb", type=int, help="Size limit for evict (default: IMAGE_CACHE_MAX_MB or 500).")
+
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        shutil.rmtree(IMAGE_CACHE_DIR, ignore_errors=True)
+        print(f"Cleared {IMAGE_CACHE_DIR}")
+    elif args.command == "evict":
+        max_bytes = args.max_mb * 1024 * 1024 if args.max_mb is not None else DEFAULT_MAX_BYTES
+        print(f"Freed {evict(max_bytes) / (1024 * 1024):.1f} MB")
+    else:
+        count = total = 0
+        for root, _, files in os.walk(IMAGE_CACHE_DIR):
+            for name in files:
+                count += 1
+                total += os.path.getsize(os.path.join(root, name))
+        print(f"{IMAGE_CACHE_DIR}: {count} images, {total / (1024 * 1024):.1f} MB (limit {DEFAULT_MAX_BYTES / (1024 * 1024):.0f} MB)")
@@ -0,0 +1,109 @@
+import json
+import time
+import zlib
+import base64
+import random
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def tiny_png(width=16, height=9, color=(40, 120, 200)):
+    """Builds a solid-colour PNG without Pillow."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    row = b"\x00" + bytes(color) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+class StubState:
+    def __init__(self, latency, rate_limit_ratio, error_ratio):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.counts = {"ok": 0, "429": 0, "503": 0}
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self, outcome):
+        with self.lock:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+
+    def summary(self):
+        with self.lock:
+            return f"requests: {self.counts}, max concurrent: {self.max_in_flight}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers the two image endpoints the generators call:
+
+    - Gemini:  POST /v1beta/models/<model>:generateContent
+    - OpenAI:  POST /v1/images/generations
+    """
+
+    state = None
+    image_b64 = base64.b64encode(tiny_png()).decode("ascii")
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.state.enter()
+        outcome = "ok"
+        try:
+            time.sleep(self.state.latency)
+            roll = random.random()
+            if roll < self.state.rate_limit_ratio:
+                outcome = "429"
+                self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted (stub).", "status": "RESOURCE_EXHAUSTED"}})
+            elif roll < self.state.rate_limit_ratio + self.state.error_ratio:
+                outcome = "503"
+                self._send_json(503, {"error": {"code": 503, "message": "The model is overloaded (stub).", "status": "UNAVAILABLE"}})
+            elif ":generateContent" in self.path:
+                self._send_json(200, {"candidates": [{"content": {"role": "model", "parts": [
+                    {"inlineData": {"mimeType": "image/png", "data": self.image_b64}}]}}]})
+            elif self.path.rstrip("/").endswith("/images/generations"):
+                self._send_json(200, {"created": int(time.time()), "data": [{"b64_json": self.image_b64}]})
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+        finally:
+            self.state.leave(outcome)
+        print(f"{self.path} -> {outcome} ({self.state.summary()})")
+
+    def log_message(self, format, *args):
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Gemini and OpenAI image APIs for offline batch tests and benchmarks.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds each request takes (default: 2).")
+    parser.add_argument("--rate_limit_ratio", type=float, default=0.2, help="Share of requests answered with 429 (default: 0.2).")
+    parser.add_argument("--error_ratio", type=float, default=0.05, help="Share of requests answered with 503 (default: 0.05).")
+
+    args = parser.parse_args()
+
+    StubHandler.state = StubState(args.latency, args.rate_limit_ratio, args.error_ratio)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Image API stub listening on http://127.0.0.1:{args.port}")
+    print(f"  GOOGLE_API_BASE_URL=http://127.0.0.1:{args.port} GOOGLE_API_KEY=stub")
+    print(f"  OPENAI_BASE_URL=http://127.0.0.1:{args.port}/v1 OPENAI_API_KEY=stub")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {StubHandler.state.summary()}")
@@ -0,0 +1,142 @@
+import json
+import argparse
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+# The publishing rules of the workflows: Shorts daily at noon, cuts on Wednesdays and Saturdays at noon.
+PRESETS = {
+    "shorts": ["daily@12:00"],
+    "cuts": ["wed,sat@12:00"],
+}
+# Slots are looked for this far ahead before giving up.
+MAX_DAYS = 3 * 366
+
+def parse_rules(rules):
+    """
+    Parses slot rules like "daily@12:00", "wed,sat@12:00" or "mon-fri@09:30,18:00",
+    or a preset name (see PRESETS).
+
+    Returns:
+        A list of (weekday numbers, datetime.time) pairs, Monday being 0.
+    """
+    parsed = []
+    for rule in rules:
+        if rule in PRESETS:
+            parsed += parse_rules(PRESETS[rule])
+            continue
+        days_spec, _, times_spec = rule.lower().partition("@")
+        if not times_spec:
+            raise ValueError(f"Invalid slot rule '{rule}': expected <days>@<HH:MM>[,<HH:MM>...].")
+        days = set()
+        for part in days_spec.split(","):
+            if part == "daily":
+                days.update(range(7))
+            elif "-" in part:
+                first, last = (WEEKDAYS.index(day[:3]) for day in part.split("-"))
+                days.update(day % 7 for day in range(first, last + 1 + (7 if last < first else 0)))
+            else:
+                days.add(WEEKDAYS.index(part[:3]))
+        times = [time.fromisoformat(t) for t in times_spec.split(",")]
+        parsed += [(frozenset(days), t) for t in times]
+    return parsed
+
+def parse_timezone(name=None):
+    """A ZoneInfo for name (e.g. America/Sao_Paulo), or the local timezone."""
+    return ZoneInfo(name) if name else datetime.now().astimezone().tzinfo
+
+def slot_key(dt):
+    """A datetime (or ISO string) as a UTC minute, the unit slots are compared in."""
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return dt.astimezone(timezone.utc).replace(second=0, microsecond=0)
+
+def iter_slots(rules, tz, start):
+    """Yields every slot at or after start, in order, as datetimes in tz."""
+    start = start.astimezone(tz)
+    day = start.date()
+    for _ in range(MAX_DAYS):
+        for slot_time in sorted({t for days, t in rules if day.weekday() in days}):
+            slot = datetime.combine(day, slot_time, tzinfo=tz)
+            if slot >= start:
+                yield slot
+        day += timedelta(days=1)
+
+def taken_slots(conn=None, ledger=None, exclude=()):
+    """
+    Publish times already in use, as UTC minutes: scheduled videos in the
+    uploads mirror (uploads_mirror.py) and in the upload ledger. Videos in
+    exclude (e.g. the ones being rescheduled) do not count.
+    """
+    taken = set()
+    if conn is not None:
+        for video_id, publish_at in conn.execute("SELECT id, publish_at FROM videos WHERE publish_at IS NOT NULL AND privacy != 'public'"):
+            if video_id not in exclude:
+                taken.add(slot_key(publish_at))
+    if ledger is not None:
+        for entry in ledger.entries():
+            if entry.get("publish_at") and entry["video_id"] not in exclude:
+                taken.add(slot_key(entry["publish_at"]))
+    return taken
+
+def allocate_slots(rules, count, tz=None, start=None, taken=()):
+    """
+    Assigns count videos to the first free slots at or after start.
+
+    Args:
+        rules: Slot rules or preset names (see parse_rules).
+        count: The number of slots to return.
+        tz: Timezone the rule times are in (a tzinfo or a name; default: local).
+        start: Earliest slot (default: now). Naive datetimes are taken in tz.
+        taken: Slots already in use (see taken_slots), skipped.
+
+    Returns:
+        A list of count timezone-aware datetimes in tz.
+    """
+    zone = parse_timezone(tz) if tz is None or isinstance(tz, str) else tz
+    now = datetime.now(zone)
+    if start is None:
+        start = now
+    elif start.tzinfo is None:
+        start = start.replace(tzinfo=zone)
+    # YouTube only accepts publish times in the future.
+    start = max(start, now)
+
+    taken = {slot_key(t) for t in taken}
+    slots = []
+    for slot in iter_slots(parse_rules(rules), zone, start):
+        if len(slots) == count:
+            break
+        if slot_key(slot) not in taken:
+            slots.append(slot)
+    if len(slots) < count:
+        raise ValueError(f"Only {len(slots)} free slots found in the next {MAX_DAYS} days for rules {rules}.")
+    return slots
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign videos to free publishing slots (no API calls).")
+    parser.add_argument("--rules", nargs="+", default=["shorts"], help='Slot rules like "daily@12:00" or "wed,sat@12:00", or a preset: ' + ", ".join(PRESETS) + " (default: shorts).")
+    parser.add_argument("--count", type=int, required=True, help="Number of slots to assign.")
+    parser.add_argument("--start", help="Earliest slot (ISO 8601, e.g. 2025-12-07 or 2025-12-07T12:00:00; default: now).")
+    parser.add_argument("--timezone", help="Timezone of the rule times, e.g. America/Sao_Paulo (default: local).")
+    parser.add_argument("--ignore_taken", action="store_true", help="Do not skip slots already used by scheduled videos in the uploads mirror and upload ledger.")
+    parser.add_argument("--json", action="store_true", help="Print the slots as a JSON list.")
+
+    args = parser.parse_args()
+
+    taken = set()
+    if not args.ignore_taken:
+        import uploads_mirror
+        from upload_ledger import UploadLedger
+        taken = taken_slots(uploads_mirror.connect(), UploadLedger())
+
+    start = datetime.fromisoformat(args.start) if args.start else None
+    slots = allocate_slots(args.rules, args.count, args.timezone, start, taken)
+    if args.json:
+        print(json.dumps([slot.isoformat() for slot in slots]))
+    else:
+        for slot in slots:
+            print(f"{slot:%a %Y-%m-%d %H:%M %z}\t{slot.isoformat()}")
+        print(f"{len(slots)} slots ({len(taken)} already taken).")
@@ -1,6 +1,29 @@
+import os
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
+from encode_image import FORMATS, encode_to_budget
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+# Named output sizes for batch mode.
+DERIVATIVES = {
+    "youtube": (1280, 720),       # YouTube thumbnail
+    "wordpress": (1200, 628),     # WordPress featured image
+    "wordpress-thumb": (150, 150),
+    "og": (1200, 630),            # Open Graph / LinkedIn / Facebook card
+    "twitter": (1200, 675),       # X/Twitter summary_large_image card
+    "square": (1080, 1080),       # Instagram
+}
+# Derivatives keep their exact size under --max_kb, so they may drop further
+# in quality than encode_image's default floor before giving up.
+DERIVATIVE_MIN_QUALITY = 50
+
 def resize_image(input_path, output_path, width, height):
     """
     Resizes an image to the specified dimensions.
@@ -21,13 +44,125 @@ def resize_image(input_path, output_path, width, height):
     except Exception as e:
         print(f"An error occurred during image resizing: {e}")
 
+def center_crop_box(src_width, src_height, width, height):
+    """Largest box with the target aspect ratio, centred in the source."""
+    target = width / height
+    if src_width / src_height > target:
+        crop_width = round(src_height * target)
+        left = (src_width - crop_width) // 2
+        return (left, 0, left + crop_width, src_height)
+    crop_height = round(src_width / target)
+    top = (src_height - crop_height) // 2
+    return (0, top, src_width, top + crop_height)
+
+def fit(img, width, height):
+    """
+    Centre-crops img to the target aspect ratio and resizes it.
+
+    Large downscales first use Image.reduce (fast integer box filter) down to
+    about twice the target, then LANCZOS for the final step.
+    """
+    box = center_crop_box(img.width, img.height, width, height)
+    factor = int(min((box[2] - box[0]) / width, (box[3] - box[1]) / height) / 2)
+    if factor > 1:
+        return img.reduce(factor, box=box).resize((width, height), Image.LANCZOS)
+    return img.resize((width, height), Image.LANCZOS, box=box)
+
+def resize_derivatives(input_path, output_dir, sizes=None, extension="png", max_bytes=None):
+    """
+    Decodes the source once and writes every derivative size.
+
+    JPEG sources are decoded with Image.draft at the smallest DCT scale that
+    still covers the largest derivative.
+
+    Args:
+        input_path: Source image.
+        output_dir: Where "<name>_<label>_<w>x<h>.<extension>" files are written.
+        sizes: {label: (width, height)} (default: DERIVATIVES).
+        max_bytes: For jpg/webp output, the byte budget each file is encoded to.
+            The quality is lowered down to DERIVATIVE_MIN_QUALITY, never the
+            dimensions; a derivative that still does not fit raises ValueError.
+
+    Returns:
+        A dict with the output paths, elapsed seconds and decoded image bytes.
+    """
+    sizes = sizes or DERIVATIVES
+    started = time.perf_counter()
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+
+    with Image.open(input_path) as img:
+        max_width = max(w for w, _ in sizes.values())
+        max_height = max(h for _, h in sizes.values())
+        img.draft("RGB", (max_width, max_height))
+        img.load()
+        decoded_bytes = img.width * img.height * len(img.getbands())
+
+        outputs = []
+        for label, (width, height) in sizes.items():
+            output_path = os.path.join(output_dir, f"{stem}_{label}_{width}x{height}.{extension}")
+            derivative = fit(img, width, height)
+            if max_bytes and extension.lower() in FORMATS:
+                data, _, _ = encode_to_budget(derivative, max_bytes, extension, DERIVATIVE_MIN_QUALITY, downscale=False)
+                with open(output_path, "wb") as f:
+                    f.write(data)
+                outputs.append(output_path)
+                continue
+            if extension.lower() in ("jpg", "jpeg") and derivative.mode not in ("RGB", "L"):
+                derivative = derivative.convert("RGB")
+            derivative.save(output_path)
+            outputs.append(output_path)
+
+    return {"input_path": input_path, "outputs": outputs, "elapsed": time.perf_counter() - started, "decoded_bytes": decoded_bytes}
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+def resize_batch(input_paths, output_dir, sizes=None, extension="png", workers=4, max_bytes=None):
+    """Writes the derivatives of many images across a thread pool and prints per-image timing."""
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(resize_derivatives, path, output_dir, sizes, extension, max_bytes) for path in input_paths]
+        for path, future in zip(input_paths, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error processing {path}: {e}")
+                continue
+            results.append(result)
+            print(f"{path}: {len(result['outputs'])} derivatives in {result['elapsed'] * 1000:.0f} ms "
+                  f"(decoded {result['decoded_bytes'] / (1024 * 1024):.1f} MB)")
+
+    peak = peak_rss_mb()
+    peak_text = f", peak RSS {peak:.0f} MB" if peak is not None else ""
+    print(f"{len(results)}/{len(input_paths)} images in {time.perf_counter() - started:.2f}s{peak_text}")
+    return results
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Resize an image to specified dimensions.")
-    parser.add_argument("input_path", type=str, help="Path to the input image file.")
-    parser.add_argument("output_path", type=str, help="Path to save the resized image file.")
-    parser.add_argument("--width", type=int, required=True, help="Desired width of the output image.")
-    parser.add_argument("--height", type=int, required=True, help="Desired height of the output image.")
+    parser = argparse.ArgumentParser(description="Resize an image to specified dimensions, or write several derivative sizes for many images.")
+    parser.add_argument("input_path", type=str, nargs="?", help="Path to the input image file.")
+    parser.add_argument("output_path", type=str, nargs="?", help="Path to save the resized image file.")
+    parser.add_argument("--width", type=int, help="Desired width of the output image.")
+    parser.add_argument("--height", type=int, help="Desired height of the output image.")
+    parser.add_argument("--batch", nargs="+", metavar="IMAGE", help="Batch mode: images to derive sizes from (each decoded once).")
+    parser.add_argument("--output_dir", default=".", help="Batch mode: output directory (default: current directory).")
+    parser.add_argument("--sizes", help=f"Batch mode: comma-separated derivative names (default: all of {', '.join(DERIVATIVES)}).")
+    parser.add_argument("--format", default="png", help="Batch mode: output extension (default: png).")
+    parser.add_argument("--max_kb", type=int, help=f"Batch mode: byte budget per file in KB for jpg/webp output (quality picked by binary search, down to {DERIVATIVE_MIN_QUALITY}; sizes are kept).")
+    parser.add_argument("--workers", type=int, default=4, help="Batch mode: images processed in parallel (default: 4).")
 
     args = parser.parse_args()
 
-    resize_image(args.input_path, args.output_path, args.width, args.height)
+    if args.batch:
+        sizes = {name: DERIVATIVES[name] for name in args.sizes.split(",")} if args.sizes else None
+        resize_batch(args.batch, args.output_dir, sizes, args.format, args.workers, args.max_kb * 1024 if args.max_kb else None)
+    else:
+        if not (args.input_path and args.output_path and args.width and args.height):
+            parser.error("input_path, output_path, --width and --height are required (or use --batch).")
+        resize_image(args.input_path, args.output_path, args.width, args.height)
@@ -1,107 +1,36 @@
-import os
 import argparse
-import google.oauth2.credentials
-import google_auth_oauthlib.flow
-import google.auth.transport.requests
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from datetime import datetime, timedelta
+from datetime import timedelta, timezone
 import dateutil.parser
 
-# Reuse the credentials file from the update script
-CLIENT_SECRETS_FILE = 'client_secret.json'
-SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
-API_SERVICE_NAME = 'youtube'
-API_VERSION = 'v3'
-CREDENTIALS_FILE = 'credentials_update.json'
+import uploads_mirror
 
-def get_authenticated_service():
-    flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-        CLIENT_SECRETS_FILE, SCOPES)
-    
-    credentials = None
-    if os.path.exists(CREDENTIALS_FILE):
-        credentials = google.oauth2.credentials.Credentials.from_authorized_user_file(CREDENTIALS_FILE, SCOPES)
+from publish_calendar import allocate_slots, taken_slots
+from upload_ledger import UploadLedger
+from youtube_client import api_call_count, execute_requests, get_authenticated_service, resolve_playlists
+from youtube_quota import record_quota
 
-    if not credentials or not credentials.valid:
-        if credentials and credentials.expired and credentials.refresh_token:
-            credentials.refresh(google.auth.transport.requests.Request())
-        else:
-            flow.redirect_uri = 'urn:ietf:wg:oauth:2.0:oob'
-            auth_url, _ = flow.authorization_url(prompt='consent')
-            print(f'Please go to this URL: {auth_url}')
-            code = input('Enter the authorization code: ')
-            flow.fetch_token(code=code)
-            credentials = flow.credentials
-        
-        with open(CREDENTIALS_FILE, 'w') as f:
-            f.write(credentials.to_json())
-    
-    return build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
-
-def get_playlist_id_by_name(youtube, playlist_name):
-    # Same logic as update_youtube_video.py
-    request = youtube.playlists().list(
-        part='snippet',
-        mine=True,
-        maxResults=50
-    )
-    while request:
-        response = request.execute()
-        for item in response['items']:
-            if item['snippet']['title'].lower() == playlist_name.lower():
-                return item['id']
-        request = youtube.playlists().list_next(request, response)
-    return None
-
-def list_videos(youtube, query):
-    print(f"Fetching all uploads to search for query: '{query}'...")
-    videos = []
-    
-    # 1. Get Uploads Playlist ID
-    channels_response = youtube.channels().list(
-        mine=True,
-        part='contentDetails'
-    ).execute()
-    
-    if not channels_response['items']:
-        print("No channel found.")
-        return []
-        
-    uploads_playlist_id = channels_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-    
-    # 2. Iterate through Uploads Playlist
-    request = youtube.playlistItems().list(
-        part='snippet,status',
-        playlistId=uploads_playlist_id,
-        maxResults=50
-    )
-    
-    matching_videos = []
-    
-    while request:
-        response = request.execute()
-        for item in response['items']:
-            video_id = item['snippet']['resourceId']['videoId']
-            title = item['snippet']['title']
-            description = item['snippet']['description']
-            published_at = item['snippet']['publishedAt']
-            privacy = item['status']['privacyStatus']
-            
-            # Check if query matches title or description (case-insensitive)
-            if query.lower() in title.lower() or query.lower() in description.lower():
-                matching_videos.append({
-                    'id': video_id,
-                    'title': title,
-                    'published_at': published_at,
-                    'privacy': privacy
-                })
-        
-        request = youtube.playlistItems().list_next(request, response)
-        
-    # Sort by published_at ascending (Oldest first)
-    matching_videos.sort(key=lambda x: x['published_at'])
-    return matching_videos
+def list_videos(youtube, query, full_sync=None):
+    """
+    Uploads whose title or description contains query, oldest first.
+
+    Syncs the local uploads mirror (see uploads_mirror.py) and filters it
+    locally, so only new uploads cost API calls. An incremental sync does not
+    see privacy changes of older uploads, so the live status of the matching
+    non-public videos is read again (one videos.list call per 50); otherwise a
+    scheduled video that went public would be listed, and rescheduled, as private.
+    """
+    conn = uploads_mirror.connect()
+    counts = uploads_mirror.sync_uploads(conn, youtube, full=full_sync)
+    print(f"Uploads mirror: {counts['added']} added, {counts['updated']} updated, {counts['removed']} removed "
+          f"({'full' if counts['full'] else 'incremental'} sync, {counts['pages']} pages).")
+    print(f"Searching uploads for query: '{query}'...")
+    videos = uploads_mirror.query_videos(conn, query)
+    not_public = [v['id'] for v in videos if v['privacy'] != 'public']
+    if not_public and not counts['full']:
+        uploads_mirror.sync_schedules(conn, youtube, not_public)
+        videos = uploads_mirror.query_videos(conn, query)
+    return videos
 
 def calculate_next_schedule_date(start_date, index, interval_days=1):
     # Daily strategy: Start Date + index * interval
@@ -113,15 +42,22 @@ def main():
     parser.add_argument('--query', required=True, help='Search query to filter videos (e.g. original video ID or title).')
     parser.add_argument('--start_date', help='Start date for scheduling (ISO 8601, e.g. 2025-12-07T12:00:00).')
     parser.add_argument('--interval', type=int, default=1, help='Interval in days between videos (default: 1).')
+    parser.add_argument('--slots', nargs='+', help='Publish into free calendar slots instead of every --interval days: rules like "wed,sat@12:00" or a preset (shorts, cuts; see publish_calendar.py).')
+    parser.add_argument('--timezone', help='Timezone of the --slots times, e.g. America/Sao_Paulo (default: local).')
+    parser.add_argument('--sync_schedules', action='store_true', help='With --slots, first read the publishAt of every non-public upload, so schedules set elsewhere count as taken.')
     parser.add_argument('--playlists', nargs='+', help='List of playlist IDs or Names.')
     parser.add_argument('--confirm', action='store_true', help='Execute the scheduling (otherwise dry-run).')
     parser.add_argument('--include_public', action='store_true', help='Include public videos in the list/schedule.')
+    parser.add_argument('--refresh_playlists', action='store_true', help='Re-fetch the playlist name -> ID map instead of using the cached one.')
+    parser.add_argument('--full_sync', action='store_true', help='Re-read the whole uploads playlist instead of only new uploads.')
+    parser.add_argument('--no_ledger', action='store_true', help='Send every update even if the upload ledger shows it was already made.')
+    parser.add_argument('--no_batch', action='store_true', help='Send each update/playlist insert as its own request instead of batching them.')
     
     args = parser.parse_args()
     
     try:
         youtube = get_authenticated_service()
-        all_videos = list_videos(youtube, args.query)
+        all_videos = list_videos(youtube, args.query, True if args.full_sync else None)
         
         # Filter videos
         videos = []
@@ -138,16 +74,25 @@ def main():
         for v in videos:
             print(f"[{v['privacy']}] {v['published_at']} - {v['title']} ({v['id']})")
             
-        if not args.start_date:
-            print("\nTo schedule these videos, provide --start_date and --confirm.")
+        if not args.start_date and not args.slots:
+            print("\nTo schedule these videos, provide --start_date (or --slots) and --confirm.")
             return
 
         # Prepare scheduling
-        start_date_dt = dateutil.parser.parse(args.start_date)
+        ledger = None if args.no_ledger else UploadLedger()
+        start_date_dt = dateutil.parser.parse(args.start_date) if args.start_date else None
+        if args.slots:
+            # One pass over the calendar, skipping slots other scheduled videos already use.
+            mirror = uploads_mirror.connect()
+            if args.sync_schedules:
+                print(f"{uploads_mirror.sync_schedules(mirror, youtube)} scheduled uploads on the channel.")
+            taken = taken_slots(mirror, ledger, exclude={v['id'] for v in videos})
+            sched_dates = allocate_slots(args.slots, len(videos), args.timezone, start_date_dt, taken)
+        else:
+            sched_dates = [calculate_next_schedule_date(start_date_dt, i, args.interval) for i in range(len(videos))]
         
         print("\nProposed Schedule:")
-        for i, v in enumerate(videos):
-            sched_date = calculate_next_schedule_date(start_date_dt, i, args.interval)
+        for v, sched_date in zip(videos, sched_dates):
             print(f"Video {v['id']} -> {sched_date.isoformat()}")
 
         if not args.confirm:
@@ -157,26 +102,24 @@ def main():
         print("\nApplying changes...")
         
         # Resolve playlists
-        playlist_ids = []
-        if args.playlists:
-            for plist in args.playlists:
-                pid = get_playlist_id_by_name(youtube, plist)
-                if pid:
-                    playlist_ids.append(pid)
-                else:
-                    # Assume ID
-                    playlist_ids.append(plist)
+        playlist_ids = resolve_playlists(youtube, args.playlists, args.refresh_playlists) if args.playlists else []
                     
-        for i, v in enumerate(videos):
+        # Build every update and playlist insert first, then send them in
+        # batches of up to 50 calls per HTTP round trip.
+        schedule = []
+        update_requests = []
+        playlist_requests = []
+        for v, sched_date in zip(videos, sched_dates):
             video_id = v['id']
-            sched_date = calculate_next_schedule_date(start_date_dt, i, args.interval)
+            if sched_date.tzinfo is not None:
+                sched_date = sched_date.astimezone(timezone.utc)
             sched_str = sched_date.strftime('%Y-%m-%dT%H:%M:%S.000Z') # Force expected format
-            
-            print(f"Scheduling {video_id} for {sched_str}...")
-            
-            # Update Video
-            try:
-                youtube.videos().update(
+            # Skip what the upload ledger shows as already done (see upload_ledger.py).
+            entry = ledger.find(video_id) if ledger else None
+            schedule.append((video_id, sched_str, entry))
+
+            if not (entry and ledger.schedule_done(entry, sched_str)):
+                update_requests.append((video_id, youtube.videos().update(
                     part='status',
                     body={
                         'id': video_id,
@@ -186,32 +129,66 @@ def main():
                             'selfDeclaredMadeForKids': False
                         }
                     }
-                ).execute()
-                print("  - Scheduled.")
-            except HttpError as e:
-                print(f"  - Error scheduling: {e}")
+                )))
 
-            # Add to Playlists
             for pid in playlist_ids:
-                try:
-                    youtube.playlistItems().insert(
-                        part='snippet',
-                        body={
-                            'snippet': {
-                                'playlistId': pid,
-                                'resourceId': {
-                                    'kind': 'youtube#video',
-                                    'videoId': video_id
-                                }
+                if entry and pid in entry['playlists']:
+                    continue
+                playlist_requests.append((f'{video_id}:{pid}', youtube.playlistItems().insert(
+                    part='snippet',
+                    body={
+                        'snippet': {
+                            'playlistId': pid,
+                            'resourceId': {
+                                'kind': 'youtube#video',
+                                'videoId': video_id
                             }
                         }
-                    ).execute()
+                    }
+                )))
+
+        batched = not args.no_batch
+        mirror = uploads_mirror.connect()
+        update_results = execute_requests(youtube, update_requests, batched)
+        record_quota('videos.update', len(update_requests))
+        # Record the schedules before sending the playlist inserts, so a failure
+        # there cannot leave the channel scheduled but the mirror and ledger not.
+        for video_id, sched_str, _ in schedule:
+            if video_id in update_results and not update_results[video_id][1]:
+                uploads_mirror.record_schedule(mirror, video_id, sched_str)
+                if ledger:
+                    ledger.record_schedule(video_id, sched_str)
+
+        playlist_results = execute_requests(youtube, playlist_requests, batched)
+        record_quota('playlistItems.insert', len(playlist_requests))
+
+        for video_id, sched_str, entry in schedule:
+            print(f"Scheduling {video_id} for {sched_str}...")
+            if video_id not in update_results:
+                print("  - Already scheduled (upload ledger).")
+            elif update_results[video_id][1]:
+                print(f"  - Error scheduling: {update_results[video_id][1]}")
+            else:
+                print("  - Scheduled.")
+
+            added = []
+            for pid in playlist_ids:
+                if entry and pid in entry['playlists']:
+                    print(f"  - Already in playlist {pid} (upload ledger).")
+                    continue
+                _, error = playlist_results[f'{video_id}:{pid}']
+                if not error:
                     print(f"  - Added to playlist {pid}.")
-                except HttpError as e:
-                    if e.resp.status == 409:
-                        print(f"  - Already in playlist {pid}.")
-                    else:
-                        print(f"  - Error adding to playlist: {e}")
+                    added.append(pid)
+                elif isinstance(error, HttpError) and error.resp.status == 409:
+                    print(f"  - Already in playlist {pid}.")
+                    added.append(pid)
+                else:
+                    print(f"  - Error adding to playlist: {error}")
+            if ledger and added:
+                ledger.record_playlists(video_id, added)
+
+        print(f"\nAPI round trips: {api_call_count()} ({'batched' if batched else 'one request per call'})")
 
     except Exception as e:
         print(f"An error occurred: {e}")
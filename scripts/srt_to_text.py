@@ -1,42 +1,123 @@
 import sys
-import re
+import argparse
 
-def srt_to_text(srt_path, output_path):
-    try:
-        with open(srt_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        output = []
-        for line in lines:
+from subtitles import iter_cues
+from common import file_hash
+from transcript_cache import TranscriptCache, parse_subtitle_name
+
+# How many previously emitted words a new cue is compared against.
+# Rolling auto-captions repeat at most the last two or three cue lines.
+OVERLAP_WINDOW = 64
+# A single shared word is more often a real repetition ("the ... the")
+# than caption roll, so it only counts when it is the whole cue.
+MIN_OVERLAP = 2
+
+def estimate_tokens(text):
+    """Rough LLM token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+def dedupe_lines(cues):
+    """Returns the cue lines, dropping a line when it equals the previous one."""
+    output = []
+    for cue in cues:
+        for line in cue.text.split('\n'):
             line = line.strip()
-            # Skip numeric counters
-            if re.match(r'^\d+$', line):
-                continue
-            # Skip timestamps
-            if re.match(r'^\d{2}:\d{2}:\d{2}', line):
-                continue
             # Skip empty lines
             if not line:
                 continue
             # Only add if not a duplicate of the last line added
-            # Check if output is empty OR if current line is different from the last line added
             if not output or line != output[-1]:
                 output.append(line)
-            
-        text = '\n'.join(output)
-        
+    return output
+
+def merge_overlapping(cues):
+    """
+    Returns one line per cue holding only the words the cue adds.
+
+    YouTube auto-subs roll: each cue repeats the tail of the previous ones.
+    The longest suffix of the emitted words that is also a prefix of the
+    cue (compared case-insensitively) is dropped, so every word is kept once.
+    """
+    output = []
+    tail = []
+    for cue in cues:
+        words = cue.text.split()
+        if not words:
+            continue
+        keys = [w.lower() for w in words]
+        overlap = 0
+        for k in range(min(len(keys), len(tail)), 0, -1):
+            if k < MIN_OVERLAP and k < len(keys):
+                break
+            if tail[-k:] == keys[:k]:
+                overlap = k
+                break
+        new_words = words[overlap:]
+        if new_words:
+            output.append(' '.join(new_words))
+            tail.extend(keys[overlap:])
+            del tail[:-OVERLAP_WINDOW]
+    return output
+
+def srt_to_text(srt_path, output_path, merge=False, cache=None):
+    """
+    Converts an SRT/VTT file to plain text.
+
+    Args:
+        merge: Remove rolling-caption overlap between consecutive cues instead
+            of only dropping exact repeated lines.
+        cache: Optional TranscriptCache. yt-dlp file names ("... [VIDEO_ID].en.srt")
+            are looked up by video ID and language, and validated by content hash.
+
+    Returns:
+        A dict with the character and estimated token counts of the
+        line-deduplicated text ("before") and the written text ("after").
+    """
+    try:
+        key = parse_subtitle_name(srt_path) if cache is not None else None
+        source_hash = file_hash(srt_path) if key else None
+        before = text = None
+        if key:
+            before = cache.get_text(*key, 'lines', source_hash)
+            # Without the line text the merged text is rebuilt anyway, so skip that lookup.
+            text = cache.get_text(*key, 'merged', source_hash) if merge and before is not None else before
+
+        if before is None or text is None:
+            with open(srt_path, 'r', encoding='utf-8-sig') as f:
+                cues = list(iter_cues(f))
+
+            before = '\n'.join(dedupe_lines(cues))
+            text = '\n'.join(merge_overlapping(cues)) if merge else before
+
+            if key:
+                cache.put_cues(*key, [[cue.start, cue.end, cue.text] for cue in cues], source_hash)
+                cache.put_text(*key, 'lines', before)
+                if merge:
+                    cache.put_text(*key, 'merged', text)
+
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(text)
-            
+
     except Exception as e:
         print(f"Error processing file: {e}")
         sys.exit(1)
 
+    return {
+        'before_chars': len(before), 'before_tokens': estimate_tokens(before),
+        'after_chars': len(text), 'after_tokens': estimate_tokens(text),
+    }
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python srt_to_text.py <input_srt_path> <output_txt_path>")
-        sys.exit(1)
-        
-    srt_path = sys.argv[1]
-    output_path = sys.argv[2]
-    srt_to_text(srt_path, output_path)
+    parser = argparse.ArgumentParser(description="Convert an SRT/VTT subtitle file to plain text.")
+    parser.add_argument("srt_path", help="Path to the input SRT/VTT file.")
+    parser.add_argument("output_path", help="Path to the output text file.")
+    parser.add_argument("--merge", action="store_true", help="Merge rolling auto-caption overlap so each word is emitted once.")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Bypass the local transcript cache.")
+
+    args = parser.parse_args()
+
+    stats = srt_to_text(args.srt_path, args.output_path, merge=args.merge, cache=TranscriptCache() if args.use_cache else None)
+    if args.merge:
+        saved = 1 - stats['after_chars'] / stats['before_chars'] if stats['before_chars'] else 0
+        print(f"Transcript: {stats['before_chars']} -> {stats['after_chars']} chars, "
+              f"~{stats['before_tokens']} -> ~{stats['after_tokens']} tokens ({saved:.0%} smaller).")
@@ -0,0 +1,190 @@
+"""
+Shared SRT/WebVTT cue model, parsers and writers.
+
+Times are integer milliseconds everywhere. Readers and writers stream
+line by line, so multi-hour caption files never need to be held as text.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+class Cue:
+    """A single subtitle cue. start and end are integer milliseconds."""
+
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f"Cue({self.start}, {self.end}, {self.text!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Cue) and (self.start, self.end, self.text) == (other.start, other.end, other.text)
+
+def parse_timestamp(value):
+    """
+    Parses HH:MM:SS,mmm / HH:MM:SS.mmm / MM:SS.mmm / HH:MM:SS into milliseconds.
+
+    Raises:
+        ValueError: If the value is not a timestamp.
+    """
+    value = value.strip()
+    if len(value) == 12 and value[2] == ':' and value[5] == ':':
+        # Fast path for the fixed-width SRT/WebVTT form.
+        return (int(value[0:2]) * 3600000 + int(value[3:5]) * 60000
+                + int(value[6:8]) * 1000 + int(value[9:12]))
+    sep = value.rfind(',')
+    if sep == -1:
+        sep = value.rfind('.')
+    if sep == -1:
+        clock, ms = value, 0
+    else:
+        clock = value[:sep]
+        fraction = value[sep + 1:]
+        ms = int((fraction + '00')[:3]) if fraction else 0
+    seconds = 0
+    for part in clock.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000 + ms
+
+def format_timestamp(ms, separator=','):
+    """Formats milliseconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (separator='.', WebVTT)."""
+    if ms < 0:
+        ms = 0
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{separator}{ms:03}"
+
+def _parse_timing_line(line):
+    """Returns (start, end) for a '<start> --> <end> [settings]' line, or None."""
+    arrow = line.find('-->')
+    if arrow == -1:
+        return None
+    end_part = line[arrow + 3:].split(None, 1)
+    if not end_part:
+        return None
+    try:
+        return parse_timestamp(line[:arrow]), parse_timestamp(end_part[0])
+    except ValueError:
+        return None
+
+def iter_cues(lines):
+    """
+    Yields Cue objects from SRT or WebVTT lines.
+
+    Cue numbers/identifiers, the WEBVTT header and NOTE/STYLE blocks are
+    skipped: only lines following a timing line are kept as cue text.
+    """
+    timing = None
+    text_lines = []
+    for line in lines:
+        line = line.rstrip()
+        if not line:
+            if timing is not None:
+                yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+                timing = None
+            continue
+        if timing is None:
+            if '-->' in line:
+                timing = _parse_timing_line(line)
+                text_lines = []
+        else:
+            text_lines.append(line)
+    if timing is not None:
+        yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+
+def iter_srt(path):
+    """Streams the cues of an SRT file."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        yield from iter_cues(f)
+
+def iter_vtt(path):
+    """Streams the cues of a WebVTT file."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        yield from iter_cues(f)
+
+def read_cues(path):
+    """Reads an .srt or .vtt file into a CueList."""
+    reader = iter_vtt if path.lower().endswith('.vtt') else iter_srt
+    return CueList(reader(path))
+
+def shift_cues(cues, offset):
+    """Yields each cue moved back by offset ms (negative times are clamped when written)."""
+    for cue in cues:
+        cue.start -= offset
+        cue.end -= offset
+        yield cue
+
+def write_srt(cues, f):
+    """Writes cues to an open text file as SRT, numbered from 1."""
+    for number, cue in enumerate(cues, start=1):
+        f.write(f"{number}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{cue.text}\n\n")
+
+def write_vtt(cues, f):
+    """Writes cues to an open text file as WebVTT."""
+    f.write("WEBVTT\n\n")
+    for cue in cues:
+        f.write(f"{format_timestamp(cue.start, '.')} --> {format_timestamp(cue.end, '.')}\n{cue.text}\n\n")
+
+def save_cues(cues, path):
+    """Writes cues to an .srt or .vtt file, chosen by extension."""
+    writer = write_vtt if path.lower().endswith('.vtt') else write_srt
+    with open(path, 'w', encoding='utf-8') as f:
+        writer(cues, f)
+
+class CueList:
+    """
+    Cues sorted by start time, stored as parallel millisecond arrays.
+
+    Parse a file once and call window() for every cut: each lookup
+    binary-searches the arrays instead of scanning the whole episode.
+    """
+
+    __slots__ = ('starts', 'ends', 'texts', 'max_ends')
+
+    def __init__(self, cues=()):
+        cues = sorted(cues, key=lambda cue: cue.start)
+        self.starts = array('q', (cue.start for cue in cues))
+        self.ends = array('q', (cue.end for cue in cues))
+        self.texts = [cue.text for cue in cues]
+        # Running maximum of end times: non-decreasing, so it can be bisected
+        # to find the first cue that may still be on screen at a given time.
+        self.max_ends = array('q')
+        latest = 0
+        for end in self.ends:
+            if end > latest:
+                latest = end
+            self.max_ends.append(latest)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, i):
+        return Cue(self.starts[i], self.ends[i], self.texts[i])
+
+    def __iter__(self):
+        for i in range(len(self.texts)):
+            yield Cue(self.starts[i], self.ends[i], self.texts[i])
+
+    def window(self, start, end):
+        """
+        Returns the cues overlapping [start, end) ms, clipped to the window and
+        shifted so the window starts at zero.
+        """
+        lo = bisect_right(self.max_ends, start)
+        hi = bisect_left(self.starts, end)
+        cues = []
+        for i in range(lo, hi):
+            cue_end = self.ends[i]
+            if cue_end <= start:
+                continue
+            cue_start = self.starts[i]
+            cues.append(Cue(max(cue_start, start) - start, min(cue_end, end) - start, self.texts[i]))
+        return cues
+
+    def windows(self, ranges):
+        """Returns window(start, end) for each (start, end) pair of milliseconds."""
+        return [self.window(start, end) for start, end in ranges]
@@ -1,7 +1,88 @@
+import os
 import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from youtube_transcript_api import YouTubeTranscriptApi
 
-def get_transcript(video_id, preserve_formatting=False):
+from transcript_cache import TranscriptCache
+
+class CachedSnippet:
+    """Transcript snippet rebuilt from the cache (same fields as the API's snippets)."""
+
+    __slots__ = ("start", "duration", "text")
+
+    def __init__(self, start, duration, text):
+        self.start = start
+        self.duration = duration
+        self.text = text
+
+def cache_format(preserve_formatting):
+    return "api-formatted" if preserve_formatting else "api"
+
+def iter_snippets(video_id, preserve_formatting=False, source=None, cache=None, language="en", record=True):
+    """
+    Yields the transcript snippets (with .start, .duration and .text) of a video.
+
+    Args:
+        video_id: The ID of the YouTube video.
+        source: Object with a fetch(video_id, languages=..., preserve_formatting=...)
+            method returning snippets. Defaults to a new YouTubeTranscriptApi.
+        cache: Optional TranscriptCache. Hits are served without any network call;
+            misses are stored once the whole transcript has been fetched.
+        language: Transcript language code.
+        record: Count the cache lookup in the hit/miss statistics (False when
+            the caller already counted its own lookup).
+
+    Raises:
+        Whatever the source raises (e.g. TranscriptsDisabled), so callers can
+        tell a failure from a transcript.
+    """
+    fmt = cache_format(preserve_formatting)
+    if cache is not None:
+        cues = cache.get_cues(video_id, language, fmt, record=record)
+        if cues is not None:
+            for start, end, text in cues:
+                yield CachedSnippet(start / 1000, (end - start) / 1000, text)
+            return
+
+    if source is None:
+        source = YouTubeTranscriptApi()
+    cues = []
+    for item in source.fetch(video_id, languages=[language], preserve_formatting=preserve_formatting):
+        if cache is not None:
+            start = round(item.start * 1000)
+            cues.append([start, start + round(item.duration * 1000), item.text])
+        yield item
+    if cache is not None:
+        cache.put_cues(video_id, language, fmt, cues)
+
+def format_snippet(item, preserve_formatting=False):
+    if preserve_formatting:
+        return f"{item.start}-{item.duration}: {item.text}\n"
+    # If formatting is not preserved, just concatenate the text
+    return item.text + " "
+
+def iter_transcript(video_id, preserve_formatting=False, source=None, chunk_chars=64 * 1024, cache=None, language="en", record=True):
+    """
+    Yields the transcript as text chunks of roughly chunk_chars characters.
+
+    Snippets are buffered in a list and joined once per chunk, so building a
+    long transcript stays linear.
+    """
+    buffer = []
+    size = 0
+    for item in iter_snippets(video_id, preserve_formatting, source, cache, language, record):
+        piece = format_snippet(item, preserve_formatting)
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_chars:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+def get_transcript(video_id, preserve_formatting=False, source=None, cache=None, language="en"):
     """
     Retrieves the transcript for a given YouTube video ID.
 
@@ -10,25 +91,71 @@ def get_transcript(video_id, preserve_formatting=False):
 
     Returns:
         A string containing the transcript of the video in the format Start-duration: text.
+
+    Raises:
+        The fetch error, instead of returning it as text.
     """
-    try:
-        transcript_list = YouTubeTranscriptApi().fetch(video_id, preserve_formatting=preserve_formatting)
-        transcript = ""
-        for item in transcript_list:
-            if preserve_formatting:
-                transcript += f"{item.start}-{item.duration}: {item.text}\n"
-            else:
-                # If formatting is not preserved, just concatenate the text
-                transcript += item.text + " "
-        return transcript
-    except Exception as e:
-        return f"Error: {e}"
+    fmt = cache_format(preserve_formatting)
+    if cache is not None:
+        text = cache.get_text(video_id, language, fmt, "transcript")
+        if text is not None:
+            return text
+    # The text lookup above is the one counted; the cues fallback is not counted again.
+    text = "".join(iter_transcript(video_id, preserve_formatting, source, cache=cache, language=language, record=False))
+    if cache is not None:
+        cache.put_text(video_id, language, fmt, "transcript", text)
+    return text
+
+def fetch_transcripts(video_ids, preserve_formatting=False, max_workers=4, source=None, cache=None, language="en"):
+    """
+    Fetches the transcripts of many videos concurrently through a bounded thread pool.
+
+    Returns:
+        A (transcripts, errors) tuple of dicts keyed by video ID.
+    """
+    transcripts = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_transcript, video_id, preserve_formatting, source, cache, language): video_id for video_id in video_ids}
+        for future in as_completed(futures):
+            video_id = futures[future]
+            try:
+                transcripts[video_id] = future.result()
+            except Exception as e:
+                errors[video_id] = e
+    return transcripts, errors
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe.py <video_id> [-s]")
+    parser = argparse.ArgumentParser(description="Fetch the transcript of one or more YouTube videos.")
+    parser.add_argument("video_ids", nargs="+", help="One or more YouTube video IDs.")
+    parser.add_argument("-s", dest="preserve_formatting", action="store_true", help="Keep start/duration for every snippet.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent fetches in batch mode (default: 4).")
+    parser.add_argument("--output_dir", help="Batch mode: write {video_id}.txt files here instead of printing.")
+    parser.add_argument("--language", default="en", help="Transcript language (default: en).")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Always fetch from YouTube, bypassing the local transcript cache.")
+
+    args = parser.parse_args()
+    cache = TranscriptCache() if args.use_cache else None
+
+    if len(args.video_ids) == 1 and not args.output_dir:
+        try:
+            sys.stdout.write(get_transcript(args.video_ids[0], args.preserve_formatting, cache=cache, language=args.language))
+            print()
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
     else:
-        video_id = sys.argv[1]
-        preserve_formatting = '-s' in sys.argv
-        transcript = get_transcript(video_id, preserve_formatting=preserve_formatting)
-        print(transcript)
\ No newline at end of file
+        transcripts, errors = fetch_transcripts(args.video_ids, args.preserve_formatting, args.workers, cache=cache, language=args.language)
+        for video_id in args.video_ids:
+            if video_id in errors:
+                print(f"Error fetching {video_id}: {errors[video_id]}", file=sys.stderr)
+            elif args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                path = os.path.join(args.output_dir, f"{video_id}.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(transcripts[video_id])
+                print(f"Transcript saved to {path}")
+            else:
+                print(f"# {video_id}\n{transcripts[video_id]}\n")
+        if errors:
+            sys.exit(1)
@@ -0,0 +1,173 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+from cache_dir import cache_path
+
+DEFAULT_DB = "transcripts.sqlite3"
+
+# yt-dlp names subtitle files "<title> [<video_id>].<lang>.<ext>".
+SUBTITLE_NAME_RE = re.compile(r"\[([A-Za-z0-9_-]{11})\]\.([A-Za-z0-9_-]+)\.(srt|vtt)$")
+
+def parse_subtitle_name(path):
+    """Returns (video_id, language, format) from a yt-dlp subtitle file name, or None."""
+    match = SUBTITLE_NAME_RE.search(os.path.basename(path))
+    return match.groups() if match else None
+
+class TranscriptCache:
+    """
+    Local SQLite cache of transcripts keyed by (video_id, language, format).
+
+    Stores the raw cues ([start_ms, end_ms, text] lists) and any number of
+    derived plain-text variants, plus hit/miss counters. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_path(DEFAULT_DB)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                format TEXT NOT NULL,
+                source_hash TEXT,
+                cues TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (video_id, language, format)
+            );
+            CREATE TABLE IF NOT EXISTS texts (
+                video_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                format TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (video_id, language, format, variant)
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                kind TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    def _count(self, kind, hit):
+        column = "hits" if hit else "misses"
+        self._conn.execute("INSERT OR IGNORE INTO stats (kind) VALUES (?)", (kind,))
+        self._conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE kind = ?", (kind,))
+        self._conn.commit()
+
+    def get_cues(self, video_id, language, fmt, source_hash=None, record=True):
+        """
+        Returns the cached cues, or None on a miss.
+
+        When source_hash is given, an entry stored from different content counts as a miss.
+        With record=False the lookup is left out of the hit/miss counters (for
+        fallbacks of a lookup that was already counted).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cues, source_hash FROM transcripts WHERE video_id = ? AND language = ? AND format = ?",
+                (video_id, language, fmt)).fetchone()
+            hit = row is not None and (source_hash is None or row[1] == source_hash)
+            if record:
+                self._count(fmt, hit)
+        return json.loads(row[0]) if hit else None
+
+    def put_cues(self, video_id, language, fmt, cues, source_hash=None):
+        """Stores the raw cues and drops any text derived from a previous version."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, language, fmt, source_hash, json.dumps(cues, ensure_ascii=False), time.time()))
+            self._conn.execute(
+                "DELETE FROM texts WHERE video_id = ? AND language = ? AND format = ?",
+                (video_id, language, fmt))
+            self._conn.commit()
+
+    def get_text(self, video_id, language, fmt, variant, source_hash=None, record=True):
+        """Returns a derived text variant (e.g. "lines", "merged"), or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT t.text, s.source_hash FROM texts t JOIN transcripts s USING (video_id, language, format) "
+                "WHERE video_id = ? AND language = ? AND format = ? AND variant = ?",
+                (video_id, language, fmt, variant)).fetchone()
+            hit = row is not None and (source_hash is None or row[1] == source_hash)
+            if record:
+                self._count(f"{fmt}:{variant}", hit)
+        return row[0] if hit else None
+
+    def find_text(self, video_id, language, variant, formats=("srt", "vtt")):
+        """
+        Returns a derived text variant stored from any of formats, or None.
+
+        Counted as one lookup (under the first format) whichever format hits.
+        """
+        for fmt in formats:
+            text = self.get_text(video_id, language, fmt, variant, record=False)
+            if text is not None:
+                break
+        with self._lock:
+            self._count(f"{formats[0]}:{variant}", text is not None)
+        return text
+
+    def put_text(self, video_id, language, fmt, variant, text):
+        """Stores a derived text variant. The raw cues must already be cached."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)",
+                (video_id, language, fmt, variant, text))
+            self._conn.commit()
+
+    def count(self):
+        """Number of cached transcripts."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+    def stats(self):
+        """Returns {kind: (hits, misses)}."""
+        with self._lock:
+            return {kind: (hits, misses) for kind, hits, misses in
+                    self._conn.execute("SELECT kind, hits, misses FROM stats ORDER BY kind")}
+
+    def clear(self):
+        with self._lock:
+            self._conn.executescript("DELETE FROM transcripts; DELETE FROM texts; DELETE FROM stats;")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the local transcript cache.")
+    parser.add_argument("command", choices=["stats", "clear", "export"], help="Show hit/miss statistics, empty the cache, or write a cached transcript to a file.")
+    parser.add_argument("video_id", nargs="?", help="For export: the ID of the YouTube video.")
+    parser.add_argument("output_path", nargs="?", help="For export: where to write the text.")
+    parser.add_argument("--language", default="en", help="For export: transcript language (default: en).")
+    parser.add_argument("--variant", default="merged", help='For export: text variant written by srt_to_text.py, "lines" or "merged" (default: merged).')
+    parser.add_argument("--db", help="Path to the cache database (default: .cache/transcripts.sqlite3).")
+
+    args = parser.parse_args()
+
+    cache = TranscriptCache(args.db)
+    if args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    elif args.command == "export":
+        if not args.video_id or not args.output_path:
+            parser.error("export needs a video_id and an output_path")
+        text = cache.find_text(args.video_id, args.language, args.variant)
+        if text is None:
+            # Exit status 1 tells the workflows to download the subtitles instead.
+            print(f"No cached {args.variant} transcript for {args.video_id} ({args.language}).")
+            sys.exit(1)
+        with open(args.output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Wrote the cached transcript of {args.video_id} to {args.output_path}")
+    else:
+        print(f"{cache.path}: {cache.count()} transcripts")
+        for kind, (hits, misses) in cache.stats().items():
+            total = hits + misses
+            print(f"  {kind:<20} {hits} hits / {misses} misses ({hits / total:.0%} hit rate)" if total else f"  {kind}")
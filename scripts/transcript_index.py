@@ -0,0 +1,165 @@
+import os
+import re
+import glob
+import time
+import sqlite3
+import argparse
+
+from cache_dir import cache_path
+from subtitles import format_timestamp, iter_srt, iter_vtt
+from common import file_hash
+from transcript_cache import parse_subtitle_name
+
+DEFAULT_DB = "transcripts_fts.sqlite3"
+
+# Episode folders are named yy-mm-dd-VIDEO_ID (see organize_folders.py).
+EPISODE_DIR_RE = re.compile(r"^\d{2}-\d{2}-\d{2}-(.+)$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cues (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cues_path ON cues (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS cues_fts USING fts5(text, content='cues', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS cues_ai AFTER INSERT ON cues BEGIN
+    INSERT INTO cues_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS cues_ad AFTER DELETE ON cues BEGIN
+    INSERT INTO cues_fts (cues_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+def connect(db_path=None):
+    conn = sqlite3.connect(db_path or cache_path(DEFAULT_DB))
+    conn.executescript(SCHEMA)
+    return conn
+
+def video_id_for(path):
+    """Video ID from the yt-dlp file name, or from the yy-mm-dd-VIDEO_ID episode folder."""
+    parsed = parse_subtitle_name(path)
+    if parsed:
+        return parsed[0]
+    episode_dir = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+    match = EPISODE_DIR_RE.match(episode_dir)
+    return match.group(1) if match else episode_dir
+
+def find_subtitle_files(root):
+    """Absolute paths of the subtitle files under root, so several roots can share one index."""
+    patterns = ("*/download/*.srt", "*/download/*.vtt")
+    return sorted(p for pattern in patterns for p in glob.glob(os.path.join(os.path.abspath(root), pattern)))
+
+def is_under(path, root):
+    return os.path.commonpath([path, root]) == root
+
+def index_file(conn, path, video_id):
+    conn.execute("DELETE FROM cues WHERE path = ?", (path,))
+    reader = iter_vtt if path.lower().endswith(".vtt") else iter_srt
+    rows = []
+    previous = None
+    for cue in reader(path):
+        text = " ".join(cue.text.split())
+        # Auto-subs repeat a cue for a few milliseconds when they roll; one copy is enough.
+        if not text or text == previous:
+            continue
+        previous = text
+        rows.append((path, video_id, cue.start, cue.end, text))
+    conn.executemany("INSERT INTO cues (path, video_id, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+def update_index(conn, root="."):
+    """
+    Brings the index in line with the SRT/VTT files under root.
+
+    Files whose mtime and size are unchanged are skipped without being read;
+    files that were touched but whose content hash is the same only get
+    their mtime refreshed. Files under root that disappeared are removed
+    from the index; files indexed from other roots are left alone.
+
+    Returns:
+        A dict with counts of added, updated, unchanged and removed files.
+    """
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "cues": 0}
+    known = {path: (mtime, size, sha) for path, mtime, size, sha in conn.execute("SELECT path, mtime, size, sha256 FROM files")}
+    seen = set()
+
+    for path in find_subtitle_files(root):
+        seen.add(path)
+        stat = os.stat(path)
+        previous = known.get(path)
+        if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+            counts["unchanged"] += 1
+            continue
+        sha = file_hash(path)
+        if previous and previous[2] == sha:
+            conn.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?", (stat.st_mtime, stat.st_size, path))
+            counts["unchanged"] += 1
+            continue
+        video_id = video_id_for(path)
+        counts["cues"] += index_file(conn, path, video_id)
+        conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (path, video_id, stat.st_mtime, stat.st_size, sha))
+        counts["updated" if previous else "added"] += 1
+
+    root = os.path.abspath(root)
+    gone = [path for path in set(known) - seen if is_under(path, root)]
+    for path in gone:
+        conn.execute("DELETE FROM cues WHERE path = ?", (path,))
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        counts["removed"] += 1
+
+    conn.commit()
+    return counts
+
+def quote_terms(query):
+    """Turns free text into an FTS5 query of quoted terms (used when the raw query is not valid FTS5 syntax)."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search(conn, query, limit=20):
+    """
+    Returns ranked (video_id, start_ms, end_ms, snippet) hits for an FTS5 query.
+
+    Plain text works too: if the query is not valid FTS5 syntax, every word is quoted.
+    """
+    sql = ("SELECT c.video_id, c.start_ms, c.end_ms, snippet(cues_fts, 0, '[', ']', '...', 12) "
+           "FROM cues_fts JOIN cues c ON c.id = cues_fts.rowid "
+           "WHERE cues_fts MATCH ? ORDER BY rank LIMIT ?")
+    try:
+        return conn.execute(sql, (query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return conn.execute(sql, (quote_terms(query), limit)).fetchall()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search over the downloaded transcripts archive.")
+    parser.add_argument("--db", help="Index database (default: .cache/transcripts_fts.sqlite3).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    index_parser = subparsers.add_parser("index", help="Index new or changed */download/*.srt files.")
+    index_parser.add_argument("--root", default=".", help="Folder holding the yy-mm-dd-VIDEO_ID folders (default: current directory).")
+    search_parser = subparsers.add_parser("search", help="Search the index.")
+    search_parser.add_argument("query", help="Words or an FTS5 query (e.g. '\"event sourcing\" NOT kafka').")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of hits (default: 20).")
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    started = time.perf_counter()
+    if args.command == "index":
+        counts = update_index(conn, args.root)
+        print(f"Indexed in {time.perf_counter() - started:.2f}s: {counts['added']} added, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged, {counts['removed']} removed ({counts['cues']} cues written).")
+    else:
+        hits = search(conn, args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for video_id, start_ms, end_ms, snippet in hits:
+            print(f"{video_id}\t{format_timestamp(start_ms, '.')}\t{format_timestamp(end_ms, '.')}\t{snippet}")
+        print(f"{len(hits)} hits in {elapsed_ms:.1f} ms")
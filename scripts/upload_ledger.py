@@ -0,0 +1,144 @@
+import os
+import json
+import argparse
+import threading
+from datetime import datetime, timezone
+
+from cache_dir import cache_path
+from common import file_hash
+from youtube_upload import format_publish_at
+
+DEFAULT_LEDGER = "upload_ledger.json"
+
+# Shared by every ledger in the process (the upload queue records from several threads).
+_lock = threading.Lock()
+# (path, size, mtime) -> SHA-256, so a file is hashed once per process.
+_hashes = {}
+
+def content_hash(path):
+    """SHA-256 of a file, reused while its size and mtime do not change."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if key not in _hashes:
+        _hashes[key] = file_hash(path)
+    return _hashes[key]
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class UploadLedger:
+    """
+    What has already been uploaded, as JSON (default: .cache/upload_ledger.json).
+
+    Entries are keyed by the SHA-256 of the video file plus its title, so a
+    renamed or moved file is still recognised and re-running a workflow does
+    not upload it twice. Each entry records the video ID, the thumbnail that
+    was set (by hash), the publishAt schedule and the playlists the video was
+    added to. The file is a plain {"entries": [...]} list for reports.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_path(DEFAULT_LEDGER)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)["entries"]
+
+    def _save(self, entries):
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"entries": entries}, f, ensure_ascii=False, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def entries(self):
+        with _lock:
+            return self._load()
+
+    def get(self, video_path, title):
+        """The entry for this file content and title, or None if it was never uploaded."""
+        sha256 = content_hash(video_path)
+        for entry in self.entries():
+            if entry["sha256"] == sha256 and entry["title"] == title:
+                return entry
+        return None
+
+    def find(self, video_id):
+        for entry in self.entries():
+            if entry["video_id"] == video_id:
+                return entry
+        return None
+
+    def _update(self, video_id, **fields):
+        with _lock:
+            entries = self._load()
+            for entry in entries:
+                if entry["video_id"] == video_id:
+                    entry.update(fields, updated_at=now_iso())
+                    self._save(entries)
+                    return entry
+        return None
+
+    def record_upload(self, video_path, title, video_id, publish_at=None):
+        entry = {"sha256": content_hash(video_path), "title": title, "file": os.path.abspath(video_path),
+                 "size": os.path.getsize(video_path), "video_id": video_id, "uploaded_at": now_iso(),
+                 "thumbnail_sha256": None, "publish_at": publish_at, "playlists": [], "updated_at": now_iso()}
+        with _lock:
+            entries = [e for e in self._load() if not (e["sha256"] == entry["sha256"] and e["title"] == title)]
+            entries.append(entry)
+            self._save(entries)
+        return entry
+
+    def thumbnail_done(self, entry, thumbnail_path):
+        """True if this exact thumbnail was already set on the entry's video."""
+        return bool(entry) and entry.get("thumbnail_sha256") == content_hash(thumbnail_path)
+
+    def record_thumbnail(self, video_id, thumbnail_path):
+        return self._update(video_id, thumbnail_sha256=content_hash(thumbnail_path))
+
+    def schedule_done(self, entry, publish_at):
+        """True if the entry's video is already scheduled for publish_at (compared as UTC times)."""
+        return bool(entry and entry.get("publish_at")) and format_publish_at(entry["publish_at"]) == format_publish_at(publish_at)
+
+    def record_schedule(self, video_id, publish_at):
+        return self._update(video_id, publish_at=publish_at)
+
+    def record_playlists(self, video_id, playlist_ids):
+        """Adds playlist_ids to the playlists the video is known to be in."""
+        with _lock:
+            entries = self._load()
+            for entry in entries:
+                if entry["video_id"] == video_id:
+                    entry.update(playlists=sorted(set(entry["playlists"]) | set(playlist_ids)), updated_at=now_iso())
+                    self._save(entries)
+                    return entry
+        return None
+
+    def forget(self, video_id):
+        """Drops the video's entry (e.g. after deleting it on YouTube), so the file can be uploaded again."""
+        with _lock:
+            entries = self._load()
+            remaining = [e for e in entries if e["video_id"] != video_id]
+            self._save(remaining)
+        return len(entries) - len(remaining)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ledger of uploaded videos, used to skip work that is already done.")
+    parser.add_argument("--ledger", help="Ledger file (default: .cache/upload_ledger.json).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List uploaded videos with their thumbnail, schedule and playlists.")
+    forget_parser = subparsers.add_parser("forget", help="Drop a video from the ledger so its file is uploaded again.")
+    forget_parser.add_argument("video_id", help="The ID of the YouTube video.")
+
+    args = parser.parse_args()
+    ledger = UploadLedger(args.ledger)
+
+    if args.command == "list":
+        entries = ledger.entries()
+        for e in entries:
+            print(f"{e['video_id']}\t{e['uploaded_at']}\tthumbnail: {'yes' if e['thumbnail_sha256'] else 'no'}\t"
+                  f"publish_at: {e['publish_at'] or '-'}\tplaylists: {','.join(e['playlists']) or '-'}\t{e['title']}")
+        print(f"{len(entries)} uploads in {ledger.path}")
+    else:
+        removed = ledger.forget(args.video_id)
+        print(f"Removed {removed} entries for {args.video_id}.")
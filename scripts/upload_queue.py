@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from cache_dir import cache_path
+from upload_ledger import UploadLedger
+from youtube_quota import DEFAULT_DAILY_QUOTA, QUOTA_COSTS, QuotaTracker, is_quota_error
+from youtube_upload import DEFAULT_CHUNK_SIZE, format_publish_at
+
+DEFAULT_QUEUE = "upload_queue.json"
+ITEM_FIELDS = ("file", "title", "description", "thumbnail", "short", "publish_at", "tags", "made_for_kids", "playlists")
+# A publish_at closer than this when the upload starts counts as passed (the metadata is sent first, but leave some slack).
+PUBLISH_AT_MARGIN = timedelta(minutes=5)
+
+class UploadQueue:
+    """
+    Upload items persisted as JSON (default: .cache/upload_queue.json).
+
+    Each item has file, title, description, optional thumbnail, short,
+    publish_at, tags, made_for_kids and playlists (names or IDs), plus
+    status ("pending", "uploading", "done" or "failed"), video_id and error.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_path(DEFAULT_QUEUE)
+        self.lock = threading.Lock()
+        self.items = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.items = json.load(f)["items"]
+
+    def save(self):
+        with self.lock:
+            with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"items": self.items}, f, ensure_ascii=False, indent=2)
+            os.replace(f"{self.path}.tmp", self.path)
+
+    def add(self, item):
+        """Queues an item unless the same file is already queued. Returns True if added."""
+        if any(existing["file"] == item["file"] for existing in self.items):
+            return False
+        entry = {key: item.get(key) for key in ITEM_FIELDS}
+        entry.update(short=bool(item.get("short")), status="pending", video_id=None, error=None)
+        self.items.append(entry)
+        return True
+
+    def update(self, item, **fields):
+        with self.lock:
+            item.update(fields)
+        self.save()
+
+    def counts(self):
+        counts = {}
+        for item in self.items:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        return counts
+
+def item_cost(item, ledger=None):
+    """Quota units the item needs at most, leaving out the upload and thumbnail the ledger shows as done."""
+    entry = ledger.get(item["file"], item["title"]) if ledger else None
+    thumbnail_done = entry and item.get("thumbnail") and ledger.thumbnail_done(entry, item["thumbnail"])
+    return ((0 if entry else QUOTA_COSTS["videos.insert"])
+            + (QUOTA_COSTS["thumbnails.set"] if item.get("thumbnail") and not thumbnail_done else 0)
+            + (QUOTA_COSTS["videos.update"] if entry and item.get("publish_at") else 0)
+            + QUOTA_COSTS["playlistItems.insert"] * len(item.get("playlists") or []))
+
+def publish_at_passed(publish_at):
+    """True if publish_at is (nearly) in the past, which videos.insert rejects."""
+    due = datetime.strptime(format_publish_at(publish_at), "%Y-%m-%dT%H:%M:%S.000Z").replace(tzinfo=timezone.utc)
+    return due <= datetime.now(timezone.utc) + PUBLISH_AT_MARGIN
+
+def upload_item(item, chunk_size, ledger=None):
+    """Uploads one queue item with the Shorts or regular uploader. Returns the video ID."""
+    from youtube_client import get_authenticated_service, resolve_playlists
+    if item["short"]:
+        from upload_youtube_short import upload_video
+    else:
+        from upload_youtube_video import upload_video
+    youtube = get_authenticated_service()
+    playlist_ids = resolve_playlists(youtube, item["playlists"]) if item.get("playlists") else None
+    response = upload_video(youtube, item["file"], item["title"], item["description"] or "", item["thumbnail"], chunk_size,
+                            item.get("publish_at"), item.get("tags"), item.get("made_for_kids"), playlist_ids, ledger)
+    return response["id"]
+
+def run_queue(queue, workers=3, daily_quota=DEFAULT_DAILY_QUOTA, chunk_size=DEFAULT_CHUNK_SIZE, retry_failed=False, ledger=None):
+    """
+    Uploads the pending items, workers at a time.
+
+    Each upload reserves its quota (videos.insert plus thumbnails.set) before
+    starting. Once the next upload would exceed daily_quota, or YouTube
+    reports the quota exceeded, no new uploads start and the remaining items
+    stay pending for the next run. Items left "uploading" by a crashed run are
+    picked up again and resume from their saved upload session. Files the
+    ledger (see upload_ledger.py) shows as uploaded are not uploaded again;
+    only their missing thumbnail, schedule or playlists are sent.
+
+    publish_at is fixed when an item is queued, but items can wait days for
+    quota. An item whose publish_at has passed is uploaded unscheduled
+    (private) instead, and its status notes that it needs a new schedule.
+
+    Returns:
+        The queue's status counts.
+    """
+    tracker = QuotaTracker(daily_quota)
+    stop = threading.Event()
+    todo = [item for item in queue.items
+            if item["status"] in ("pending", "uploading") or (retry_failed and item["status"] == "failed")]
+    print(f"{len(todo)} uploads to do; quota {tracker.used()}/{tracker.budget} units used today, {workers} in parallel.")
+
+    def work(item):
+        if not os.path.exists(item["file"]):
+            queue.update(item, status="failed", error="file not found")
+            print(f"Upload of {item['file']} failed: file not found")
+            return
+        upload, note = item, None
+        if item.get("publish_at") and publish_at_passed(item["publish_at"]):
+            upload = dict(item, publish_at=None)
+            note = f"publish_at {item['publish_at']} had passed; uploaded unscheduled, reschedule it"
+        cost = item_cost(upload, ledger)
+        if stop.is_set() or not tracker.reserve(cost):
+            stop.set()
+            return
+        try:
+            queue.update(item, status="uploading", error=None)
+            print(f"Uploading {item['file']} ({item['title']})...")
+            if note:
+                print(f"  {item['file']}: {note}.")
+            video_id = upload_item(upload, chunk_size, ledger)
+            queue.update(item, status="done", video_id=video_id, error=note)
+        except Exception as e:
+            if is_quota_error(e):
+                # Quota ran out early (e.g. other tools used it); try again after the reset.
+                tracker.exhaust()
+                stop.set()
+                queue.update(item, status="pending", error="quotaExceeded")
+            else:
+                queue.update(item, status="failed", error=str(e))
+            print(f"Upload of {item['file']} failed: {e}")
+        finally:
+            tracker.release()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(work, todo))
+
+    counts = queue.counts()
+    print(f"\nQueue after {time.perf_counter() - started:.1f}s: {counts}. Quota used today: {tracker.used()}/{tracker.budget}.")
+    missed = [item for item in todo if item["status"] == "done" and item["error"]]
+    if missed:
+        print(f"{len(missed)} uploads missed their publish_at and are unscheduled; schedule them with "
+              f"schedule_channel_videos.py --slots (see upload_queue.py status).")
+    if stop.is_set() and counts.get("pending"):
+        print(f"Daily quota budget reached; {counts['pending']} uploads stay queued. "
+              f"Run again after the quota resets at {tracker.next_reset():%Y-%m-%d %H:%M %Z}.")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persistent, quota-aware YouTube upload queue with parallel uploads.")
+    parser.add_argument("--queue", help="Queue file (default: .cache/upload_queue.json).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Queue a video, or every item of a JSON manifest.")
+    add_parser.add_argument("--manifest", help='JSON list of {"file", "title", "description", "thumbnail", "short", "publish_at", "tags", "made_for_kids", "playlists"}.')
+    add_parser.add_argument("--file", help="Path to the video file.")
+    add_parser.add_argument("--title", help="Title of the video.")
+    add_parser.add_argument("--description", help="Description of the video.")
+    add_parser.add_argument("--description_file", help="Path to a file containing the description of the video.")
+    add_parser.add_argument("--thumbnail", help="Path to the thumbnail image file (optional).")
+    add_parser.add_argument("--short", action="store_true", help="Upload with the Shorts settings (upload_youtube_short.py).")
+    add_parser.add_argument("--publish_at", help="ISO 8601 date-time to publish the video, set in the upload itself.")
+    add_parser.add_argument("--tags", nargs="+", help="Tags for the video.")
+    add_parser.add_argument("--made_for_kids", action=argparse.BooleanOptionalAction, help="Declare the video as made (or not made) for kids.")
+    add_parser.add_argument("--playlists", nargs="+", help="Playlist IDs or names to add the video to after the upload.")
+
+    run_parser = subparsers.add_parser("run", help="Upload pending items until done or the daily quota budget is reached.")
+    run_parser.add_argument("--workers", type=int, default=3, help="Uploads in parallel (default: 3).")
+    run_parser.add_argument("--daily_quota", type=int, default=DEFAULT_DAILY_QUOTA, help="Daily quota budget in units (default: YOUTUBE_DAILY_QUOTA or 10000).")
+    run_parser.add_argument("--chunk_mb", type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024), help="Upload chunk size in MB (default: 16).")
+    run_parser.add_argument("--retry_failed", action="store_true", help="Also retry items that failed before.")
+    run_parser.add_argument("--no_ledger", action="store_true", help="Upload even files the upload ledger shows as already uploaded.")
+
+    subparsers.add_parser("status", help="List queued items and their video IDs.")
+
+    args = parser.parse_args()
+    queue = UploadQueue(args.queue)
+
+    if args.command == "add":
+        if args.manifest:
+            with open(args.manifest, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        else:
+            if not args.file or not args.title:
+                parser.error("add needs --manifest, or --file and --title.")
+            description = args.description
+            if args.description_file:
+                with open(args.description_file, "r") as f:
+                    description = f.read()
+            items = [{"file": args.file, "title": args.title, "description": description,
+                      "thumbnail": args.thumbnail, "short": args.short, "publish_at": args.publish_at,
+                      "tags": args.tags, "made_for_kids": args.made_for_kids, "playlists": args.playlists}]
+        added = sum(queue.add(item) for item in items)
+        queue.save()
+        print(f"Queued {added} uploads ({len(items) - added} already queued). {queue.counts()}")
+    elif args.command == "run":
+        run_queue(queue, args.workers, args.daily_quota, args.chunk_mb * 1024 * 1024, args.retry_failed,
+                  None if args.no_ledger else UploadLedger())
+    else:
+        for item in queue.items:
+            print(f"[{item['status']}] {item['video_id'] or '-'}\t{item['file']}\t{item['title']}{'  (' + item['error'] + ')' if item['error'] else ''}")
+        print(queue.counts())
@@ -1,90 +1,65 @@
-import os
 import argparse
-import google.oauth2.credentials
-import google_auth_oauthlib.flow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
-# The CLIENT_SECRETS_FILE contains your OAuth 2.0 credentials for this application.
-CLIENT_SECRETS_FILE = 'client_secret.json'
+from encode_image import YOUTUBE_THUMBNAIL_MAX_BYTES, prepare_upload_image
+from update_youtube_video import add_video_to_playlists, update_video_schedule
+from upload_ledger import UploadLedger
+from youtube_client import get_authenticated_service, resolve_playlists
+from youtube_quota import record_quota
+from youtube_upload import DEFAULT_CHUNK_SIZE, resumable_upload, video_body
 
-# This OAuth 2.0 access scope allows for full read/write access to the
-# authenticated user's YouTube account.
-SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
-API_SERVICE_NAME = 'youtube'
-API_VERSION = 'v3'
+def upload_video(youtube, video_path, title, description, thumbnail_path=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 publish_at=None, tags=None, made_for_kids=None, playlist_ids=None, ledger=None):
+    body = video_body(title, description, '28', publish_at, tags, made_for_kids) # Science & Technology. You can change this.
 
-def get_authenticated_service():
-    flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-        CLIENT_SECRETS_FILE, SCOPES)
-    
-    # Check if credentials.json exists and is valid
-    credentials = None
-    if os.path.exists('credentials.json'):
-        credentials = google.oauth2.credentials.Credentials.from_authorized_user_file('credentials.json', SCOPES)
-
-    if not credentials or not credentials.valid:
-        if credentials and credentials.expired and credentials.refresh_token:
-            credentials.refresh(google.auth.transport.requests.Request())
-        else:
-            flow.redirect_uri = 'urn:ietf:wg:oauth:2.0:oob' # For desktop apps
-            auth_url, _ = flow.authorization_url(prompt='consent')
-            print(f'Please go to this URL: {auth_url}')
-            code = input('Enter the authorization code: ')
-            flow.fetch_token(code=code)
-            credentials = flow.credentials
-        
-        with open('credentials.json', 'w') as f:
-            f.write(credentials.to_json())
-    
-    return build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
-
-def upload_video(youtube, video_path, title, description, thumbnail_path=None):
-    body = {
-        'snippet': {
-            'title': title,
-            'description': description,
-            'categoryId': '28' # Science & Technology. You can change this.
-        },
-        'status': {
-            'privacyStatus': 'private' # 'public', 'private', or 'unlisted'
-        }
-    }
-
-    # Call the API's videos.insert method to upload the video.
-    insert_request = youtube.videos().insert(
-        part=','.join(body.keys()),
-        body=body,
-        media_body=MediaFileUpload(video_path, chunksize=-1, resumable=True)
-    )
-
-    print('Uploading video...')
-    response = None
-    while response is None:
-        status, response = insert_request.next_chunk()
-        if status:
-            print(f'Uploaded {int(status.resumable_progress * 100)}%')
+    # The ledger (see upload_ledger.py) knows which files went up already and what was done to them.
+    entry = ledger.get(video_path, title) if ledger else None
+    if entry:
+        print(f'{video_path} was already uploaded as video id "{entry["video_id"]}" (upload ledger); skipping the upload.')
+        response = {'id': entry['video_id']}
+        if publish_at:
+            update_video_schedule(youtube, entry['video_id'], body['status']['publishAt'], ledger)
+    else:
+        # Call the API's videos.insert method to upload the video (resumable, see youtube_upload.py).
+        response = resumable_upload(youtube, video_path, body, chunk_size)
 
-    print(f'Video id "{response.get("id")}" was successfully uploaded.')
-    print(f'Video URL: https://www.youtube.com/watch?v={response.get("id")}')
+        print(f'Video id "{response.get("id")}" was successfully uploaded.')
+        print(f'Video URL: https://www.youtube.com/watch?v={response.get("id")}')
+        if publish_at:
+            print(f'Scheduled to publish at {body["status"]["publishAt"]}.')
+        if ledger:
+            entry = ledger.record_upload(video_path, title, response.get("id"), body['status'].get('publishAt'))
 
     # Upload thumbnail if provided
-    if thumbnail_path:
+    if thumbnail_path and ledger and ledger.thumbnail_done(entry, thumbnail_path):
+        print(f'Thumbnail {thumbnail_path} is already set (upload ledger).')
+    elif thumbnail_path:
         video_id = response.get("id")
+        source_thumbnail = thumbnail_path
         print(f'Uploading thumbnail for video ID: {video_id} from {thumbnail_path}...')
         try:
+            # Thumbnails over YouTube's 2 MB limit are re-encoded as JPEG first.
+            thumbnail_path, mime_type = prepare_upload_image(thumbnail_path, YOUTUBE_THUMBNAIL_MAX_BYTES)
+            record_quota('thumbnails.set')
             thumbnail_insert_request = youtube.thumbnails().set(
                 videoId=video_id,
-                media_body=MediaFileUpload(thumbnail_path)
+                media_body=MediaFileUpload(thumbnail_path, mimetype=mime_type)
             )
             thumbnail_response = thumbnail_insert_request.execute()
             print('Thumbnail uploaded successfully.')
+            if ledger:
+                ledger.record_thumbnail(video_id, source_thumbnail)
         except HttpError as e:
             print(f'An HTTP error {e.resp.status} occurred during thumbnail upload: {e.content.decode("utf-8")}')
         except Exception as e:
             print(f'An error occurred during thumbnail upload: {e}')
 
+    if playlist_ids:
+        add_video_to_playlists(youtube, response.get("id"), playlist_ids, ledger)
+
+    return response
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Upload a video to YouTube.')
     parser.add_argument('--file', required=True, help='Path to the video file.')
@@ -92,6 +67,13 @@ if __name__ == '__main__':
     parser.add_argument('--description', help='Description of the video.')
     parser.add_argument('--description_file', help='Path to a file containing the description of the video.')
     parser.add_argument('--thumbnail', help='Path to the thumbnail image file (optional).')
+    parser.add_argument('--publish_at', help='ISO 8601 date-time to publish the video (e.g., 2025-12-25T12:00:00-03:00; local time if no offset). Set in the upload itself, no update_youtube_video.py needed.')
+    parser.add_argument('--tags', nargs='+', help='Tags for the video.')
+    parser.add_argument('--made_for_kids', action=argparse.BooleanOptionalAction, help="Declare the video as made (or, with --no-made_for_kids, not made) for kids.")
+    parser.add_argument('--playlists', nargs='+', help='Playlist IDs or names to add the video to after the upload.')
+    parser.add_argument('--refresh_playlists', action='store_true', help='Re-fetch the playlist name -> ID map instead of using the cached one.')
+    parser.add_argument('--no_ledger', action='store_true', help='Upload even if the upload ledger shows this file and title were already uploaded.')
+    parser.add_argument('--chunk_mb', type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024), help='Upload chunk size in MB (default: 16). An interrupted upload resumes from the last completed chunk.')
 
     args = parser.parse_args()
 
@@ -105,7 +87,11 @@ if __name__ == '__main__':
 
     try:
         youtube = get_authenticated_service()
-        upload_video(youtube, args.file, args.title, video_description, args.thumbnail)
+        # Playlist names are resolved before the upload (from the cached map, see youtube_client.py).
+        playlist_ids = resolve_playlists(youtube, args.playlists, args.refresh_playlists) if args.playlists else None
+        upload_video(youtube, args.file, args.title, video_description, args.thumbnail, args.chunk_mb * 1024 * 1024,
+                     args.publish_at, args.tags, args.made_for_kids, playlist_ids,
+                     None if args.no_ledger else UploadLedger())
     except HttpError as e:
         print(f'An HTTP error {e.resp.status} occurred: {e.content.decode("utf-8")}')
     except Exception as e:
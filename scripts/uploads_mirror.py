@@ -0,0 +1,205 @@
+import time
+import sqlite3
+import argparse
+
+from cache_dir import cache_path
+
+DEFAULT_DB = "uploads.sqlite3"
+# Incremental syncs only see new uploads; a full sync also picks up privacy
+# changes and deletions of older videos. One runs automatically this often.
+FULL_SYNC_MAX_AGE = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    privacy TEXT NOT NULL,
+    publish_at TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS videos_published_at ON videos (published_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def connect(db_path=None):
+    conn = sqlite3.connect(db_path or cache_path(DEFAULT_DB))
+    conn.executescript(SCHEMA)
+    # SQLite's lower() only folds ASCII; titles are often accented.
+    conn.create_function("py_lower", 1, lambda s: s.lower() if s else s, deterministic=True)
+    return conn
+
+def get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+def uploads_playlist_id(conn, youtube):
+    """The channel's uploads playlist ID, looked up once and stored."""
+    playlist_id = get_meta(conn, "uploads_playlist_id")
+    if playlist_id:
+        return playlist_id
+    channels_response = youtube.channels().list(
+        mine=True,
+        part='contentDetails'
+    ).execute()
+    if not channels_response['items']:
+        return None
+    playlist_id = channels_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+    set_meta(conn, "uploads_playlist_id", playlist_id)
+    conn.commit()
+    return playlist_id
+
+def sync_uploads(conn, youtube, full=None):
+    """
+    Brings the mirror up to date with the uploads playlist.
+
+    The uploads playlist lists the newest videos first, so an incremental sync
+    stops after the first page that contains an already-mirrored video. A full
+    sync reads every page and drops videos that are gone; it runs when
+    full=True, on the first sync, or when the last one is older than
+    FULL_SYNC_MAX_AGE (full=False never runs one).
+
+    Args:
+        youtube: A YouTube Data API client (anything with channels() and
+            playlistItems() like googleapiclient's, e.g. one pointed at a stub).
+
+    Returns:
+        A dict with counts of added, updated and removed videos, pages read and
+        whether the sync was full.
+    """
+    counts = {"added": 0, "updated": 0, "removed": 0, "pages": 0, "full": False}
+    playlist_id = uploads_playlist_id(conn, youtube)
+    if not playlist_id:
+        print("No channel found.")
+        return counts
+
+    last_full = float(get_meta(conn, "last_full_sync") or 0)
+    if full is None:
+        full = time.time() - last_full > FULL_SYNC_MAX_AGE
+    counts["full"] = full
+
+    known = {row[0]: row[1:] for row in conn.execute("SELECT id, title, description, privacy FROM videos")}
+    seen = set()
+    now = time.time()
+    request = youtube.playlistItems().list(
+        part='snippet,status',
+        playlistId=playlist_id,
+        maxResults=50
+    )
+    while request:
+        response = request.execute()
+        counts["pages"] += 1
+        reached_known = False
+        for item in response['items']:
+            video_id = item['snippet']['resourceId']['videoId']
+            row = (item['snippet']['title'], item['snippet']['description'], item['status']['privacyStatus'])
+            seen.add(video_id)
+            previous = known.get(video_id)
+            if previous is not None:
+                reached_known = True
+                if tuple(previous) == row:
+                    continue
+                counts["updated"] += 1
+                conn.execute("UPDATE videos SET title = ?, description = ?, privacy = ?, synced_at = ? WHERE id = ?",
+                             row + (now, video_id))
+            else:
+                counts["added"] += 1
+                conn.execute("INSERT INTO videos (id, title, description, published_at, privacy, synced_at) VALUES (?, ?, ?, ?, ?, ?)",
+                             (video_id, row[0], row[1], item['snippet']['publishedAt'], row[2], now))
+        if reached_known and not full:
+            break
+        request = youtube.playlistItems().list_next(request, response)
+
+    if full:
+        for video_id in set(known) - seen:
+            conn.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+            counts["removed"] += 1
+        set_meta(conn, "last_full_sync", now)
+    set_meta(conn, "last_sync", now)
+    conn.commit()
+    return counts
+
+def sync_schedules(conn, youtube, video_ids=None):
+    """
+    Reads the live privacy and publishAt of video_ids (default: every
+    non-public mirrored video) with videos.list, 50 IDs per call. Schedules set
+    outside these scripts then count as taken slots, and scheduled videos that
+    went public since are no longer listed as private.
+
+    Returns:
+        The number of videos with a schedule.
+    """
+    if video_ids is None:
+        video_ids = [row[0] for row in conn.execute("SELECT id FROM videos WHERE privacy != 'public'")]
+    scheduled = 0
+    for i in range(0, len(video_ids), 50):
+        batch = video_ids[i:i + 50]
+        response = youtube.videos().list(part='status', id=','.join(batch), maxResults=50).execute()
+        found = {item['id']: item['status'] for item in response.get('items', [])}
+        for video_id in batch:
+            status = found.get(video_id)
+            if status is None:
+                continue
+            scheduled += bool(status.get('publishAt'))
+            conn.execute("UPDATE videos SET publish_at = ?, privacy = ? WHERE id = ?",
+                         (status.get('publishAt'), status['privacyStatus'], video_id))
+    conn.commit()
+    return scheduled
+
+def query_videos(conn, query=None, include_public=True):
+    """
+    Mirrored videos whose title or description contains query (case-insensitive),
+    oldest first, as dicts with id, title, published_at, privacy and publish_at.
+    """
+    sql = "SELECT id, title, published_at, privacy, publish_at FROM videos WHERE 1 = 1"
+    params = []
+    if query:
+        sql += " AND (instr(py_lower(title), ?) > 0 OR instr(py_lower(description), ?) > 0)"
+        params += [query.lower(), query.lower()]
+    if not include_public:
+        sql += " AND privacy != 'public'"
+    sql += " ORDER BY published_at"
+    return [{'id': video_id, 'title': title, 'published_at': published_at, 'privacy': privacy, 'publish_at': publish_at}
+            for video_id, title, published_at, privacy, publish_at in conn.execute(sql, params)]
+
+def record_schedule(conn, video_id, publish_at, privacy='private'):
+    """Stores a schedule the scripts just set, so the mirror does not wait for the next full sync."""
+    conn.execute("UPDATE videos SET publish_at = ?, privacy = ? WHERE id = ?", (publish_at, privacy, video_id))
+    conn.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SQLite mirror of the channel's uploads playlist.")
+    parser.add_argument("--db", help="Mirror database (default: .cache/uploads.sqlite3).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser("sync", help="Fetch new uploads (or everything with --full).")
+    sync_parser.add_argument("--full", action="store_true", help="Re-read the whole uploads playlist, updating privacy and removing deleted videos.")
+    sync_parser.add_argument("--schedules", action="store_true", help="Also read the publishAt of every non-public video (1 API call per 50 videos).")
+    search_parser = subparsers.add_parser("search", help="List mirrored videos matching a query (no API calls).")
+    search_parser.add_argument("query", nargs="?", help="Text to find in the title or description (default: all videos).")
+    search_parser.add_argument("--exclude_public", action="store_true", help="Leave out public videos.")
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    started = time.perf_counter()
+    if args.command == "sync":
+        from youtube_client import api_call_count, get_authenticated_service
+        youtube = get_authenticated_service()
+        counts = sync_uploads(conn, youtube, full=True if args.full else None)
+        print(f"{'Full' if counts['full'] else 'Incremental'} sync in {time.perf_counter() - started:.2f}s: "
+              f"{counts['added']} added, {counts['updated']} updated, {counts['removed']} removed "
+              f"({counts['pages']} pages, {api_call_count()} API round trips).")
+        if args.schedules:
+            print(f"{sync_schedules(conn, youtube)} scheduled videos.")
+    else:
+        videos = query_videos(conn, args.query, include_public=not args.exclude_public)
+        for v in videos:
+            print(f"[{v['privacy']}] {v['published_at']} - {v['title']} ({v['id']})")
+        print(f"{len(videos)} videos in {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -5,11 +5,15 @@ from dotenv import load_dotenv
 import markdown
 from datetime import datetime
 
+from encode_image import prepare_upload_image
+
 load_dotenv() # Load environment variables from .env file
 
 WP_URL = os.getenv("WP_URL")
 WP_USER = os.getenv("WP_USER")
 WP_PASSWORD = os.getenv("WP_PASSWORD")
+# Featured images larger than this are re-encoded as JPEG before upload.
+DEFAULT_MAX_IMAGE_BYTES = 1024 * 1024
 
 def get_headers():
     return {
@@ -72,7 +76,7 @@ def create_tag(name):
         return response.json()['id']
     return None
 
-def upload_to_wordpress(title, content_markdown, image_path=None, categories=None, tags=None, publish_date=None, status='draft'):
+def upload_to_wordpress(title, content_markdown, image_path=None, categories=None, tags=None, publish_date=None, status='draft', max_image_bytes=DEFAULT_MAX_IMAGE_BYTES):
     """
     Uploads a blog post to WordPress, optionally with a featured image, categories, tags, and schedule.
 
@@ -84,6 +88,7 @@ def upload_to_wordpress(title, content_markdown, image_path=None, categories=Non
         tags: List of tag names (optional).
         publish_date: ISO 8601 formatted date string (optional) for scheduling.
         status: Post status ('draft', 'publish', 'future').
+        max_image_bytes: Byte budget for the featured image (None uploads it unchanged).
     """
     
     if not all([WP_URL, WP_USER, WP_PASSWORD]):
@@ -102,13 +107,14 @@ def upload_to_wordpress(title, content_markdown, image_path=None, categories=Non
 
     image_id = None
     if image_path and os.path.exists(image_path):
-        # 1. Upload the image
+        # 1. Upload the image (re-encoded as JPEG first if it is over the budget)
+        image_path, mime_type = prepare_upload_image(image_path, max_image_bytes)
         with open(image_path, "rb") as f:
             image_data = f.read()
 
         headers = {
             "Content-Disposition": f"attachment; filename={os.path.basename(image_path)}",
-            "Content-Type": "image/png",
+            "Content-Type": mime_type,
         }
 
         response = requests.post(
@@ -207,6 +213,7 @@ if __name__ == "__main__":
     parser.add_argument("--tags", type=str, help="Comma-separated list of tags.")
     parser.add_argument("--publish_date", type=str, help="ISO 8601 date string to schedule the post (e.g., 2023-10-27T10:00:00).")
     parser.add_argument("--status", type=str, default="draft", choices=['draft', 'publish', 'future'], help="Post status.")
+    parser.add_argument("--max_image_kb", type=int, default=DEFAULT_MAX_IMAGE_BYTES // 1024, help="Re-encode the featured image as JPEG if it is larger than this (default: 1024; 0 to upload it unchanged).")
 
     args = parser.parse_args()
 
@@ -223,5 +230,6 @@ if __name__ == "__main__":
         categories=cat_list, 
         tags=tag_list, 
         publish_date=args.publish_date,
-        status=args.status
+        status=args.status,
+        max_image_bytes=args.max_image_kb * 1024 or None
     )
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+
+import google.oauth2.credentials
+import google_auth_oauthlib.flow
+import google.auth.transport.requests
+import google_auth_httplib2
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+
+from cache_dir import cache_path
+
+# The CLIENT_SECRETS_FILE contains your OAuth 2.0 credentials for this application.
+CLIENT_SECRETS_FILE = 'client_secret.json'
+# One credential store for every YouTube script (uploads, updates, scheduling).
+CREDENTIALS_FILE = os.getenv('YOUTUBE_CREDENTIALS_FILE', 'youtube_credentials.json')
+# Per-script files used before the shared store; reused if they already grant every scope.
+LEGACY_CREDENTIALS_FILES = ['credentials_update.json', 'credentials.json']
+
+SCOPES = [
+    'https://www.googleapis.com/auth/youtube.upload',
+    'https://www.googleapis.com/auth/youtube.force-ssl',
+]
+API_SERVICE_NAME = 'youtube'
+API_VERSION = 'v3'
+DISCOVERY_URL = f'https://www.googleapis.com/discovery/v1/apis/{API_SERVICE_NAME}/{API_VERSION}/rest'
+DISCOVERY_MAX_AGE = timedelta(days=7)
+# Access tokens are refreshed this long before they expire, so a long upload
+# loop never hits an expired token mid-request.
+REFRESH_MARGIN = timedelta(minutes=5)
+# The YouTube batch endpoint accepts at most 50 calls per request.
+BATCH_SIZE = 50
+# The playlist name -> ID map is re-fetched after this many seconds.
+PLAYLIST_CACHE_TTL = int(os.getenv('PLAYLIST_CACHE_TTL', str(24 * 3600)))
+
+_api_calls = 0
+_api_calls_lock = threading.Lock()
+
+_setup = None
+_setup_lock = threading.Lock()
+_local = threading.local()
+_playlist_map = None
+_playlist_map_fetched = False
+
+def _read_credentials(path):
+    with open(path, 'r') as f:
+        info = json.load(f)
+    granted = info.get('scopes') or []
+    if isinstance(granted, str):
+        granted = granted.split()
+    if not set(SCOPES) <= set(granted):
+        return None
+    return google.oauth2.credentials.Credentials.from_authorized_user_info(info, SCOPES)
+
+def _save_credentials(credentials):
+    with open(CREDENTIALS_FILE, 'w') as f:
+        f.write(credentials.to_json())
+
+def _needs_refresh(credentials):
+    if not credentials.valid:
+        return True
+    # google-auth keeps expiry as a naive UTC datetime.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return credentials.expiry is not None and credentials.expiry - now < REFRESH_MARGIN
+
+def get_credentials():
+    """
+    Loads the shared credentials, refreshing the access token if it expires
+    within REFRESH_MARGIN, or runs the consent flow if there are none.
+
+    Returns:
+        (credentials, status) where status is "valid", "refreshed" or "new".
+    """
+    credentials = None
+    for path in [CREDENTIALS_FILE] + LEGACY_CREDENTIALS_FILES:
+        if os.path.exists(path):
+            credentials = _read_credentials(path)
+            if credentials:
+                break
+
+    if credentials and not _needs_refresh(credentials):
+        if not os.path.exists(CREDENTIALS_FILE):
+            _save_credentials(credentials)
+        return credentials, 'valid'
+
+    if credentials and credentials.refresh_token:
+        credentials.refresh(google.auth.transport.requests.Request())
+        _save_credentials(credentials)
+        return credentials, 'refreshed'
+
+    flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
+        CLIENT_SECRETS_FILE, SCOPES)
+    flow.redirect_uri = 'urn:ietf:wg:oauth:2.0:oob' # For desktop apps
+    auth_url, _ = flow.authorization_url(prompt='consent')
+    print(f'Please go to this URL: {auth_url}')
+    code = input('Enter the authorization code: ')
+    flow.fetch_token(code=code)
+    credentials = flow.credentials
+    _save_credentials(credentials)
+    return credentials, 'new'
+
+def get_discovery_document(refresh=False):
+    """
+    Returns the YouTube discovery document, cached in .cache/discovery/.
+
+    The cache is filled from the copy bundled with google-api-python-client
+    when there is one, else fetched once over the network, and renewed after
+    DISCOVERY_MAX_AGE. refresh=True always fetches the live document.
+
+    Returns:
+        (document, source) where source is "cache", "bundled" or "fetched".
+    """
+    path = cache_path('discovery', f'{API_SERVICE_NAME}.{API_VERSION}.json')
+    if not refresh and os.path.exists(path) and time.time() - os.path.getmtime(path) < DISCOVERY_MAX_AGE.total_seconds():
+        with open(path, 'r') as f:
+            return f.read(), 'cache'
+
+    document, source = None, 'fetched'
+    if not refresh:
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            document, source = get_static_doc(API_SERVICE_NAME, API_VERSION), 'bundled'
+        except ImportError:
+            pass
+    if not document:
+        import requests
+        response = requests.get(DISCOVERY_URL, timeout=30)
+        response.raise_for_status()
+        document, source = response.text, 'fetched'
+
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(document)
+    os.replace(f'{path}.tmp', path)
+    return document, source
+
+class CountingHttp(google_auth_httplib2.AuthorizedHttp):
+    """AuthorizedHttp that counts HTTP round trips (see api_call_count)."""
+
+    def request(self, *args, **kwargs):
+        global _api_calls
+        with _api_calls_lock:
+            _api_calls += 1
+        return super().request(*args, **kwargs)
+
+def api_call_count():
+    """HTTP round trips made by the YouTube client in this process."""
+    return _api_calls
+
+def execute_requests(youtube, requests, batched=True, batch_size=BATCH_SIZE):
+    """
+    Executes (key, request) pairs, BATCH_SIZE per HTTP round trip when batched.
+
+    Args:
+        requests: List of (key, HttpRequest); keys must be unique strings.
+        batched: False executes each request on its own (one round trip each).
+
+    Returns:
+        {key: (response, error)} with error None, the call's HttpError, or the
+        exception that failed its whole batch (e.g. a rejected batch request or
+        a dropped connection), so one bad batch never hides the others' results.
+    """
+    results = {}
+    if not batched:
+        for key, request in requests:
+            try:
+                results[key] = (request.execute(), None)
+            except HttpError as e:
+                results[key] = (None, e)
+        return results
+
+    def callback(request_id, response, exception):
+        results[request_id] = (response, exception)
+
+    for i in range(0, len(requests), batch_size):
+        chunk = requests[i:i + batch_size]
+        batch = youtube.new_batch_http_request(callback=callback)
+        for key, request in chunk:
+            batch.add(request, request_id=key)
+        try:
+            batch.execute()
+        except Exception as e:
+            for key, _ in chunk:
+                results.setdefault(key, (None, e))
+    return results
+
+def fetch_playlist_map(youtube):
+    """Pages through the channel's playlists once and returns {lowercased title: ID}."""
+    playlists = {}
+    request = youtube.playlists().list(
+        part='snippet',
+        mine=True,
+        maxResults=50
+    )
+    while request:
+        response = request.execute()
+        for item in response['items']:
+            playlists.setdefault(item['snippet']['title'].lower(), item['id'])
+        request = youtube.playlists().list_next(request, response)
+    return playlists
+
+def load_playlist_map(youtube, refresh=False):
+    """
+    Returns the case-insensitive playlist name -> ID map, persisted in
+    .cache/playlists.json and re-fetched after PLAYLIST_CACHE_TTL or on refresh.
+
+    Returns:
+        (playlists, fresh) where fresh is True if it was fetched by this process.
+    """
+    global _playlist_map, _playlist_map_fetched
+    path = cache_path('playlists.json')
+    if not refresh:
+        if _playlist_map is not None:
+            return _playlist_map, _playlist_map_fetched
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                cached = json.load(f)
+            if time.time() - cached['fetched_at'] < PLAYLIST_CACHE_TTL:
+                _playlist_map = cached['playlists']
+                return _playlist_map, False
+
+    _playlist_map = fetch_playlist_map(youtube)
+    _playlist_map_fetched = True
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump({'fetched_at': time.time(), 'playlists': _playlist_map}, f, ensure_ascii=False, indent=2)
+    os.replace(f'{path}.tmp', path)
+    return _playlist_map, True
+
+def get_playlist_id_by_name(youtube, playlist_name, refresh=False):
+    """
+    Looks a playlist up by name (case-insensitive) in the cached map. A name
+    missing from a map loaded from disk triggers a re-fetch (at most once per
+    process), in case the playlist is new.
+
+    Returns:
+        The playlist ID, or None if no playlist has that name.
+    """
+    playlists, fresh = load_playlist_map(youtube, refresh)
+    key = playlist_name.lower()
+    if key not in playlists and not fresh:
+        playlists, _ = load_playlist_map(youtube, refresh=True)
+    return playlists.get(key)
+
+def resolve_playlists(youtube, names_or_ids, refresh=False):
+    """Maps playlist names to IDs; anything that is not a known name is assumed to be an ID."""
+    playlists, _ = load_playlist_map(youtube, refresh)
+    known_ids = set(playlists.values())
+    playlist_ids = []
+    for plist in names_or_ids:
+        found_id = plist if plist in known_ids else get_playlist_id_by_name(youtube, plist)
+        if found_id:
+            playlist_ids.append(found_id)
+        else:
+            print(f"Could not find playlist with name '{plist}', assuming it is an ID.")
+            playlist_ids.append(plist)
+    return playlist_ids
+
+def get_authenticated_service():
+    """
+    Returns an authorised YouTube Data API client, built from the cached
+    discovery document and the shared credential store.
+
+    The discovery document and credentials are loaded once per process and
+    each thread gets its own client (httplib2 connections are not thread-safe).
+    Set YOUTUBE_API_ROOT_URL (e.g. http://127.0.0.1:8766/) to send every
+    request to a local stub; without stored credentials the stub is called
+    anonymously.
+    """
+    global _setup
+    service = getattr(_local, 'service', None)
+    if service is not None:
+        return service
+
+    started = time.perf_counter()
+    with _setup_lock:
+        first = _setup is None
+        if first:
+            document, discovery_source = get_discovery_document()
+            discovery = json.loads(document)
+
+            root_url = os.getenv('YOUTUBE_API_ROOT_URL')
+            if root_url:
+                root_url = root_url.rstrip('/') + '/'
+                discovery['rootUrl'] = root_url
+                discovery['baseUrl'] = root_url + discovery['servicePath']
+                discovery['mtlsRootUrl'] = root_url
+
+            if root_url and not os.path.exists(CREDENTIALS_FILE):
+                credentials, token_status = AnonymousCredentials(), 'anonymous'
+            else:
+                credentials, token_status = get_credentials()
+            _setup = (discovery, credentials)
+        discovery, credentials = _setup
+
+    _local.service = build_from_document(discovery, http=CountingHttp(credentials, http=build_http()))
+    if first:
+        root_url = os.getenv('YOUTUBE_API_ROOT_URL')
+        print(f'YouTube client ready in {(time.perf_counter() - started) * 1000:.0f} ms '
+              f'(discovery: {discovery_source}, token: {token_status}{", root: " + root_url if root_url else ""})')
+    return _local.service
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Authorise the YouTube scripts and refresh the cached discovery document.')
+    parser.add_argument('--refresh_discovery', action='store_true', help='Re-download the discovery document into .cache/discovery/.')
+
+    args = parser.parse_args()
+
+    if args.refresh_discovery:
+        _, source = get_discovery_document(refresh=True)
+        print(f'Discovery document refreshed ({source}).')
+    get_authenticated_service()
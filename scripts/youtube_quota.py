@@ -0,0 +1,125 @@
+import os
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from cache_dir import cache_path
+
+# Quota units per call (YouTube Data API v3 defaults; list calls cost 1 and are not tracked).
+QUOTA_COSTS = {
+    'videos.insert': 1600,
+    'videos.update': 50,
+    'thumbnails.set': 50,
+    'playlistItems.insert': 50,
+}
+DEFAULT_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', '10000'))
+# The daily quota resets at midnight Pacific Time.
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# Shared by every tracker in the process, so concurrent record() calls do not lose updates.
+_lock = threading.Lock()
+_local = threading.local()
+_reservations = {'total': 0}
+
+class QuotaTracker:
+    """
+    Quota units spent today, persisted in .cache/youtube_quota.json so every
+    script run counts against the same daily budget.
+
+    reserve() holds units for the calls a thread is about to make, so parallel
+    uploads cannot overshoot the budget together. record() persists what was
+    actually spent and uses up the calling thread's reservation first.
+    """
+
+    def __init__(self, budget=DEFAULT_DAILY_QUOTA, path=None):
+        self.budget = budget
+        self.path = path or cache_path('youtube_quota.json')
+        self.lock = _lock
+
+    @staticmethod
+    def quota_day():
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    @staticmethod
+    def next_reset():
+        """Local time at which the quota resets next."""
+        now = datetime.now(QUOTA_TIMEZONE)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), QUOTA_TIMEZONE)
+        return midnight.astimezone()
+
+    def _load_used(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            if state.get('day') == self.quota_day():
+                return state.get('used', 0)
+        return 0
+
+    def _save_used(self, used):
+        with open(f'{self.path}.tmp', 'w') as f:
+            json.dump({'day': self.quota_day(), 'used': used}, f)
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def used(self):
+        with self.lock:
+            return self._load_used()
+
+    def remaining(self):
+        with self.lock:
+            return self.budget - self._load_used() - _reservations['total']
+
+    def reserve(self, units):
+        """Holds units for the calling thread. Returns False if they would exceed the budget."""
+        with self.lock:
+            if self._load_used() + _reservations['total'] + units > self.budget:
+                return False
+            _reservations['total'] += units
+            _local.reserved = getattr(_local, 'reserved', 0) + units
+            return True
+
+    def release(self):
+        """Drops whatever is left of the calling thread's reservation."""
+        with self.lock:
+            _reservations['total'] -= getattr(_local, 'reserved', 0)
+            _local.reserved = 0
+
+    def record(self, units):
+        with self.lock:
+            self._save_used(self._load_used() + units)
+            taken = min(units, getattr(_local, 'reserved', 0))
+            _local.reserved = getattr(_local, 'reserved', 0) - taken
+            _reservations['total'] -= taken
+
+    def reset(self):
+        with self.lock:
+            self._save_used(0)
+
+    def exhaust(self):
+        """Marks today's budget as spent (e.g. after a quotaExceeded error)."""
+        with self.lock:
+            self._save_used(max(self.budget, self._load_used()))
+
+def record_quota(method, count=1):
+    """Adds count calls of method (see QUOTA_COSTS) to today's usage."""
+    if count:
+        QuotaTracker().record(QUOTA_COSTS[method] * count)
+
+def is_quota_error(e):
+    """True for the 403 quotaExceeded / dailyLimitExceeded errors."""
+    return getattr(getattr(e, 'resp', None), 'status', None) == 403 and (
+        'quotaExceeded' in str(e) or 'dailyLimitExceeded' in str(e) or
+        b'quotaExceeded' in (getattr(e, 'content', b'') or b''))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Show the YouTube API quota used today (Pacific Time day).')
+    parser.add_argument('--daily_quota', type=int, default=DEFAULT_DAILY_QUOTA, help='Daily budget in units (default: YOUTUBE_DAILY_QUOTA or 10000).')
+    parser.add_argument('--reset', action='store_true', help="Forget today's recorded usage.")
+
+    args = parser.parse_args()
+
+    tracker = QuotaTracker(args.daily_quota)
+    if args.reset:
+        tracker.reset()
+    print(f'{tracker.quota_day()}: {tracker.used()}/{tracker.budget} units used; resets at {tracker.next_reset():%Y-%m-%d %H:%M %Z}.')
@@ -0,0 +1,273 @@
+import json
+import time
+import uuid
+import random
+import socket
+import struct
+import argparse
+import threading
+from email import message_from_string
+from email.parser import BytesParser
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPLOADS_PLAYLIST_ID = "UUstubUploads"
+PLAYLISTS = {"PLstubShorts": "Shorts", "PLstubCuts": "Cortes"}
+
+class StubChannel:
+    """In-memory channel: uploads (newest first) and a few playlists."""
+
+    def __init__(self, uploads):
+        self.lock = threading.Lock()
+        self.videos = []
+        self.counts = {}
+        # Resumable upload sessions: id -> {"metadata", "size", "received"}
+        self.sessions = {}
+        started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for i in range(uploads):
+            self.add_video(f"Stub video {i}", f"Cut {i} of episode stub{i // 10}", started + timedelta(hours=i),
+                           "public" if i % 3 else "private")
+
+    def add_video(self, title, description, published_at=None, privacy="private"):
+        with self.lock:
+            video_id = f"stub{len(self.videos):07d}"
+            published_at = published_at or datetime.now(timezone.utc)
+            self.videos.insert(0, {"id": video_id, "title": title, "description": description,
+                                   "publishedAt": published_at.strftime("%Y-%m-%dT%H:%M:%SZ"), "privacy": privacy})
+            return video_id
+
+    def update_status(self, video_id, status):
+        with self.lock:
+            for video in self.videos:
+                if video["id"] == video_id:
+                    video["privacy"] = status.get("privacyStatus", video["privacy"])
+                    video["publishAt"] = status.get("publishAt")
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def summary(self):
+        with self.lock:
+            return f"requests: {self.counts}, videos: {len(self.videos)}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers the YouTube Data API calls the scripts make, under /youtube/v3/
+    (set YOUTUBE_API_ROOT_URL=http://127.0.0.1:<port>/):
+
+    - GET channels, playlists, playlistItems (paged, 50 per page), videos (status by id)
+    - POST playlistItems, PUT videos (videos.update), thumbnails.set
+    - POST /batch: multipart/mixed batches of the calls above, answered per part
+    - Resumable videos.insert: POST starts a session, PUT uploads chunks or
+      ("bytes */size") asks how many bytes arrived. With drop_ratio, chunk
+      uploads are cut off halfway, keeping only the bytes received so far.
+    - POST /stub/videos adds an upload ({"title", "description"}) to test incremental syncs
+    """
+
+    channel = None
+    latency = 0.0
+    drop_ratio = 0.0
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, items, query, kind):
+        max_results = int(query.get("maxResults", ["5"])[0])
+        offset = int(query.get("pageToken", ["0"])[0])
+        page = {"kind": kind, "items": items[offset:offset + max_results],
+                "pageInfo": {"totalResults": len(items), "resultsPerPage": max_results}}
+        if offset + max_results < len(items):
+            page["nextPageToken"] = str(offset + max_results)
+        return page
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        self.channel.count(f"GET {resource}")
+        time.sleep(self.latency)
+        self._send_json(*self._get(url))
+
+    def _get(self, url):
+        """Answers a GET call as (status, payload)."""
+        query = parse_qs(url.query)
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if resource == "channels":
+            return 200, {"items": [{"id": "UCstub", "contentDetails": {"relatedPlaylists": {"uploads": UPLOADS_PLAYLIST_ID}}}]}
+        elif resource == "playlists":
+            items = [{"id": pid, "snippet": {"title": title}} for pid, title in PLAYLISTS.items()]
+            return 200, self._page(items, query, "youtube#playlistListResponse")
+        elif resource == "videos":
+            ids = query.get("id", [""])[0].split(",")
+            with self.channel.lock:
+                videos = [v for v in self.channel.videos if v["id"] in ids]
+            items = [{"kind": "youtube#video", "id": v["id"],
+                      "status": {"privacyStatus": v["privacy"], **({"publishAt": v["publishAt"]} if v.get("publishAt") else {})}}
+                     for v in videos]
+            return 200, {"kind": "youtube#videoListResponse", "items": items}
+        elif resource == "playlistItems":
+            with self.channel.lock:
+                videos = list(self.channel.videos)
+            items = [{"snippet": {"title": v["title"], "description": v["description"], "publishedAt": v["publishedAt"],
+                                  "resourceId": {"kind": "youtube#video", "videoId": v["id"]}},
+                      "status": {"privacyStatus": v["privacy"]}} for v in videos]
+            return 200, self._page(items, query, "youtube#playlistItemListResponse")
+        return 404, {"error": {"code": 404, "message": f"Unknown path {url.path}"}}
+
+    def _video_resource(self, video_id, metadata):
+        return {"kind": "youtube#video", "id": video_id, "snippet": metadata.get("snippet", {}), "status": metadata.get("status", {})}
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        self.channel.count(f"POST {resource}")
+        time.sleep(self.latency)
+
+        if url.path == "/batch":
+            self._batch(body)
+        elif url.path.startswith("/upload/") and resource == "videos":
+            metadata = json.loads(body or b"{}")
+            session_id = uuid.uuid4().hex
+            with self.channel.lock:
+                self.channel.sessions[session_id] = {"metadata": metadata, "size": int(self.headers.get("X-Upload-Content-Length") or 0), "received": 0}
+            self.send_response(200)
+            self.send_header("Location", f"http://{self.headers['Host']}/upload/session/{session_id}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self._send_json(*self._post(url, body))
+
+    def _post(self, url, body):
+        """Answers a (non-upload) POST call as (status, payload)."""
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if url.path == "/stub/videos":
+            payload = json.loads(body or b"{}")
+            return 200, {"id": self.channel.add_video(payload.get("title", "New stub video"), payload.get("description", ""))}
+        elif resource == "set":
+            return 200, {"kind": "youtube#thumbnailSetResponse", "items": []}
+        elif resource == "playlistItems":
+            return 200, {"kind": "youtube#playlistItem", "id": uuid.uuid4().hex, **json.loads(body or b"{}")}
+        return 404, {"error": {"code": 404, "message": f"Unknown path {url.path}"}}
+
+    def _put(self, url, body):
+        """Answers a (non-upload) PUT call as (status, payload)."""
+        payload = json.loads(body or b"{}")
+        if url.path.rstrip("/").rsplit("/", 1)[-1] == "videos":
+            self.channel.update_status(payload.get("id"), payload.get("status", {}))
+        return 200, payload
+
+    def _batch(self, body):
+        """
+        Answers a batch request: every application/http part is dispatched like
+        its own call, and the answers go back as parts with matching Content-IDs.
+        """
+        message = BytesParser().parsebytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body)
+        boundary = uuid.uuid4().hex
+        parts = []
+        for part in message.get_payload():
+            request_line, _, rest = part.get_payload().partition("\n")
+            method, target, _ = request_line.split(" ", 2)
+            inner = message_from_string(rest)
+            url = urlparse(target)
+            self.channel.count(f"{method} {url.path.rstrip('/').rsplit('/', 1)[-1]} (batched)")
+            handler = {"GET": lambda: self._get(url), "POST": lambda: self._post(url, inner.get_payload().encode("utf-8")),
+                       "PUT": lambda: self._put(url, inner.get_payload().encode("utf-8"))}.get(method)
+            status, payload = handler() if handler else (405, {"error": {"code": 405, "message": f"Unsupported method {method}"}})
+            content_id = part["Content-ID"]
+            parts.append(f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id[1:]}\r\n\r\n"
+                         f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\nContent-Type: application/json\r\n\r\n"
+                         f"{json.dumps(payload)}\r\n")
+        data = ("".join(parts) + f"--{boundary}--\r\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        time.sleep(self.latency)
+
+        if not url.path.startswith("/upload/session/"):
+            self.channel.count(f"PUT {resource}")
+            self._send_json(*self._put(url, self.rfile.read(length)))
+            return
+
+        self.channel.count("PUT upload chunk")
+        with self.channel.lock:
+            session = self.channel.sessions.get(resource)
+        if session is None:
+            self.rfile.read(length)
+            self._send_json(404, {"error": {"code": 404, "message": "Upload session not found."}})
+            return
+
+        content_range = self.headers.get("Content-Range", "")
+        if length and random.random() < self.drop_ratio:
+            # Keep half the chunk, then reset the connection without answering.
+            start = int(content_range.split()[1].split("-")[0])
+            data = self.rfile.read(length)
+            if start == session["received"]:
+                session["received"] += len(data) // 2
+            self.close_connection = True
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.connection.close()
+            print(f"Dropped upload {resource[:8]} at {session['received']} bytes")
+            return
+
+        if length:
+            spec, total = content_range.split()[1].split("/")
+            start = int(spec.split("-")[0])
+            data = self.rfile.read(length)
+            if total != "*":
+                session["size"] = int(total)
+            if start == session["received"]:
+                session["received"] += len(data)
+
+        if session["size"] and session["received"] >= session["size"]:
+            video_id = session.get("video_id")
+            if video_id is None:
+                snippet = session["metadata"].get("snippet", {})
+                video_id = session["video_id"] = self.channel.add_video(snippet.get("title", "Uploaded video"), snippet.get("description", ""))
+                self.channel.update_status(video_id, session["metadata"].get("status", {}))
+                print(f"Upload {resource[:8]} complete: {session['received']} bytes -> {video_id}")
+            self._send_json(200, self._video_resource(video_id, session["metadata"]))
+            return
+
+        self.send_response(308)
+        if session["received"]:
+            self.send_header("Range", f"bytes=0-{session['received'] - 1}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the YouTube Data API for offline tests of the YouTube scripts.")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on (default: 8766).")
+    parser.add_argument("--uploads", type=int, default=1200, help="Uploads the stub channel starts with (default: 1200).")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds each request takes (default: 0.2).")
+    parser.add_argument("--drop_ratio", type=float, default=0.0, help="Share of upload chunks cut off halfway with a dropped connection (default: 0).")
+
+    args = parser.parse_args()
+
+    StubHandler.channel = StubChannel(args.uploads)
+    StubHandler.latency = args.latency
+    StubHandler.drop_ratio = args.drop_ratio
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"YouTube API stub listening on http://127.0.0.1:{args.port}")
+    print(f"  YOUTUBE_API_ROOT_URL=http://127.0.0.1:{args.port}/ YOUTUBE_CREDENTIALS_FILE=stub_credentials.json")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {StubHandler.channel.summary()}")
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import random
+import socket
+import http.client
+from datetime import datetime, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+
+from youtube_quota import record_quota
+
+# Chunks must be a multiple of 256 KB. Smaller chunks lose less on a dropped
+# connection; larger ones need fewer round trips.
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+MAX_RETRIES = 10
+RETRIABLE_STATUSES = {500, 502, 503, 504}
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, socket.error, http.client.HTTPException, ConnectionError, TimeoutError)
+
+def format_publish_at(value):
+    """
+    An ISO 8601 date-time as the UTC string YouTube expects for publishAt.
+    Times without a timezone are taken as local time.
+    """
+    publish_at = datetime.fromisoformat(value)
+    if publish_at.tzinfo is None:
+        publish_at = publish_at.astimezone()
+    return publish_at.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def video_body(title, description, category_id, publish_at=None, tags=None, made_for_kids=None):
+    """
+    The videos.insert resource for a private upload. With publish_at the video
+    is scheduled in the same call, so no videos.update is needed afterwards.
+    """
+    body = {
+        'snippet': {
+            'title': title,
+            'description': description,
+            'categoryId': category_id
+        },
+        'status': {
+            'privacyStatus': 'private' # 'public', 'private', or 'unlisted'
+        }
+    }
+    if tags:
+        body['snippet']['tags'] = list(tags)
+    if publish_at:
+        # Scheduled videos must be private until publishAt.
+        body['status']['publishAt'] = format_publish_at(publish_at)
+    if made_for_kids is not None:
+        body['status']['selfDeclaredMadeForKids'] = made_for_kids
+    return body
+
+def upload_state_path(video_path):
+    return f"{video_path}.upload.json"
+
+def load_upload_state(video_path):
+    """The saved session for video_path, or None if there is none or the file changed since."""
+    path = upload_state_path(video_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        state = json.load(f)
+    stat = os.stat(video_path)
+    if state.get('size') != stat.st_size or state.get('mtime') != stat.st_mtime:
+        print(f'{video_path} changed since the interrupted upload; starting over.')
+        os.remove(path)
+        return None
+    return state
+
+def save_upload_state(video_path, session_uri, offset):
+    stat = os.stat(video_path)
+    state = {'session_uri': session_uri, 'offset': offset, 'size': stat.st_size, 'mtime': stat.st_mtime}
+    path = upload_state_path(video_path)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(f'{path}.tmp', path)
+
+def clear_upload_state(video_path):
+    path = upload_state_path(video_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+def _point_at_session(insert_request, session_uri, offset=0):
+    """
+    Makes insert_request continue the upload session at session_uri, or start
+    a new one when session_uri is None.
+
+    googleapiclient cannot resume a session from another process, so this sets
+    the private HttpRequest._in_error_state. HttpRequest.next_chunk sets it
+    itself after a failed chunk, and while it is set the next call first sends
+    an empty PUT with "Content-Range: bytes */<size>" to the session and takes
+    the offset from the server's Range header. That way no byte is assumed
+    received that YouTube did not confirm. Clearing it when starting over keeps
+    an old error state from querying a session that no longer exists.
+    (Checked against google-api-python-client 2.x.)
+    """
+    insert_request.resumable_uri = session_uri
+    insert_request.resumable_progress = offset
+    insert_request._in_error_state = session_uri is not None
+
+def resumable_upload(youtube, video_path, body, chunk_size=DEFAULT_CHUNK_SIZE, max_retries=MAX_RETRIES):
+    """
+    Uploads a video with videos.insert in chunks, resuming across failures and restarts.
+
+    The session URI and confirmed offset are saved to "<video>.upload.json"
+    after every chunk. A later call for the same file asks YouTube how much
+    it has and continues from the last confirmed byte, instead of starting a
+    new upload. 5xx responses and socket errors are retried with exponential
+    backoff, resuming the same way.
+
+    Args:
+        youtube: The YouTube Data API client.
+        video_path: Path to the video file.
+        body: The videos.insert resource (snippet, status, ...). Ignored when
+            resuming, since YouTube already has it from the original request.
+        chunk_size: Bytes per request (a multiple of 256 KB, or -1 for one request).
+        max_retries: Consecutive failures tolerated before giving up.
+
+    Returns:
+        The inserted video resource.
+    """
+    insert_request = youtube.videos().insert(
+        part=','.join(body.keys()),
+        body=body,
+        media_body=MediaFileUpload(video_path, chunksize=chunk_size, resumable=True)
+    )
+    size = os.path.getsize(video_path)
+
+    state = load_upload_state(video_path)
+    if state:
+        print(f'Resuming interrupted upload of {video_path} from {state["offset"] / size:.0%}...')
+        _point_at_session(insert_request, state['session_uri'], state['offset'])
+    else:
+        record_quota('videos.insert')
+
+    print('Uploading video...')
+    started = time.perf_counter()
+    response = None
+    failures = 0
+    while response is None:
+        try:
+            status, response = insert_request.next_chunk()
+            failures = 0
+            if status:
+                save_upload_state(video_path, insert_request.resumable_uri, status.resumable_progress)
+                print(f'Uploaded {int(status.progress() * 100)}%')
+        except HttpError as e:
+            if e.resp.status in (404, 410) and insert_request.resumable_uri:
+                # The upload session expired; the only option is a new one.
+                print('Upload session expired; starting over.')
+                clear_upload_state(video_path)
+                _point_at_session(insert_request, None)
+                record_quota('videos.insert')
+                continue
+            if e.resp.status not in RETRIABLE_STATUSES:
+                raise
+            error = f'HTTP {e.resp.status}'
+        except RETRIABLE_EXCEPTIONS as e:
+            # next_chunk has marked the request as in error, so the retry asks
+            # the server for its offset first (see _point_at_session).
+            error = f'{type(e).__name__}: {e}'
+        else:
+            continue
+
+        if insert_request.resumable_uri:
+            save_upload_state(video_path, insert_request.resumable_uri, insert_request.resumable_progress)
+        failures += 1
+        if failures > max_retries:
+            raise RuntimeError(f'Upload of {video_path} failed after {max_retries} retries ({error}). '
+                               f'Run again to resume from {upload_state_path(video_path)}.')
+        delay = random.uniform(0, min(60, 2 ** failures))
+        print(f'{error}; retrying in {delay:.1f}s (attempt {failures}/{max_retries})...')
+        time.sleep(delay)
+
+    clear_upload_state(video_path)
+    elapsed = time.perf_counter() - started
+    print(f'Upload finished in {elapsed:.1f}s ({size / (1024 * 1024) / max(elapsed, 1e-6):.1f} MB/s).')
+    return response